@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
 
@@ -31,3 +33,10 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def inline_tasks(settings):
+    # Фоновые задачи (миниатюры) пишут в MEDIA_ROOT уже после ответа,
+    # а временная папка mock_media к этому моменту удалена.
+    settings.TASK_BROKER = 'core.tasks.ImmediateBroker'
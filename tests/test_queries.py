@@ -0,0 +1,70 @@
+import pytest
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+
+from posts.counters import reconcile_user_stats
+from posts.models import Comment, Follow, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def add_comments(mixer, post, count):
+    for author in mixer.cycle(count).blend('auth.User'):
+        Comment.objects.create(post=post, author=author, text='Комментарий')
+        Post.objects.filter(pk=post.pk).update(comment_count=post.comments.count())
+
+
+def urls(post):
+    username = post.author.username
+    return {
+        'index': '/',
+        'group': f'/group/{post.group.slug}/',
+        'profile': f'/{username}/',
+        'post': f'/{username}/{post.id}/',
+        'follow': '/follow/',
+    }
+
+
+def count_queries(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(captured)
+
+
+class TestQueryCounts:
+
+    @pytest.mark.parametrize('view, expected', [
+        ('index', 6), ('group', 7), ('profile', 8), ('post', 5), ('follow', 4),
+    ])
+    def test_views_query_count(self, mixer, user_client, another_user,
+                               few_posts_with_group, view, expected,
+                               django_assert_num_queries):
+        Follow.objects.create(user=another_user, author=few_posts_with_group.author)
+        Follow.objects.create(user=few_posts_with_group.author, author=another_user)
+        mixer.cycle(3).blend(Post, author=another_user, group=few_posts_with_group.group)
+        post = Post.objects.filter(author=few_posts_with_group.author).first()
+        add_comments(mixer, post, 3)
+        reconcile_user_stats()
+        url = urls(post)[view]
+        cache.clear()
+        with django_assert_num_queries(expected):
+            user_client.get(url)
+
+    @pytest.mark.parametrize('view', ['index', 'group', 'profile', 'post', 'follow'])
+    def test_query_count_does_not_grow_with_comments(self, mixer, user_client, another_user,
+                                                     few_posts_with_group, view):
+        Follow.objects.create(user=few_posts_with_group.author, author=another_user)
+        mixer.cycle(3).blend(Post, author=another_user)
+        post = Post.objects.filter(author=few_posts_with_group.author).first()
+        url = urls(post)[view]
+        add_comments(mixer, post, 2)
+        reconcile_user_stats()
+        before = count_queries(user_client, url)
+        add_comments(mixer, post, 20)
+        after = count_queries(user_client, url)
+        assert before == after, (
+            f'Число запросов на странице `{url}` растёт вместе с числом комментариев'
+        )
@@ -0,0 +1,14 @@
+def serialize_post(post):
+    """
+    Компактное представление поста для ленты: только то,
+    что нужно карточке в приложении.
+    """
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.thumbnail_url or None,
+        'comments': post.comment_count,
+    }
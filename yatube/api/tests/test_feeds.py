@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from groups.models import Group
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(POSTS_PER_PAGES=3)
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Тестовая группа')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author,
+                 group=cls.group if i % 2 else None)
+            for i in range(5)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(FeedApiTest.reader)
+
+    def test_cursor_pages(self):
+        """Лента листается курсором до конца"""
+        url = reverse('api:index')
+        first = self.client.get(url).json()
+        self.assertEqual([post['text'] for post in first['results']],
+                         ['Пост 4', 'Пост 3', 'Пост 2'])
+        self.assertEqual(first['results'][0], {
+            'id': first['results'][0]['id'], 'text': 'Пост 4',
+            'pub_date': first['results'][0]['pub_date'],
+            'author': 'PavelZ', 'group': None, 'image': None,
+            'comments': 0,
+        })
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        self.assertEqual([post['text'] for post in second['results']],
+                         ['Пост 1', 'Пост 0'])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(url, {'cursor': 'x'}).status_code,
+                         400)
+
+    def test_feeds(self):
+        """Ленты сообщества, автора и подписок"""
+        cases = (
+            (self.client, reverse('api:group_posts',
+                                  kwargs={'slug': 'group'}), 2),
+            (self.client, reverse('api:profile',
+                                  kwargs={'username': 'PavelZ'}), 3),
+            (self.reader_client, reverse('api:follow_index'), 3),
+        )
+        for client, url, count in cases:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(len(response.json()['results']), count)
+        self.assertEqual(self.client.get(reverse('api:follow_index'))
+                         .status_code, 401)
+        self.assertEqual(self.client.get(reverse(
+            'api:group_posts', kwargs={'slug': 'missing'}
+        )).status_code, 404)
+
+    def test_not_modified(self):
+        """304 без чтения постов, пока лента не изменилась"""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response['Last-Modified'])
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(captured), 1)
+        self.assertNotIn('"posts_post"."text"', captured[0]['sql'])
+
+        post = Post.objects.first()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reader_client.post(reverse('add_comment', kwargs={
+                'username': 'PavelZ', 'post_id': post.pk
+            }), {'text': 'Комментарий'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comments'], 1)
@@ -0,0 +1,97 @@
+from core.budgets import query_budget
+from django.conf import settings
+from django.http import JsonResponse
+from groups.models import Group
+from posts import timeline
+from posts.conditional import conditional_response, feed_validators
+from posts.models import Post, User
+from posts.paginators import KEYS, CursorPaginator, InvalidCursor
+
+from .serializers import serialize_post
+
+# Поля, которые читает serialize_post, — остальное не грузим
+POST_FIELDS = ('id', 'text', 'pub_date', 'image', 'thumbnail',
+               'comment_count', 'author', 'author__username',
+               'group', 'group__slug')
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={
+        'ensure_ascii': False, 'separators': (',', ':')
+    })
+
+
+def _error(detail, status):
+    return _json({'detail': detail}, status=status)
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.POSTS_PER_PAGES))
+    except ValueError:
+        limit = settings.POSTS_PER_PAGES
+    return min(max(limit, 1), settings.API_MAX_LIMIT)
+
+
+def _feed(request, queryset, keys=KEYS, scope=None, parts=()):
+    """
+    Страница ленты по ?cursor= в JSON; 304, если лента
+    не менялась с прошлого запроса клиента.
+    """
+    queryset = queryset.select_related('author', 'group').only(*POST_FIELDS)
+
+    def render():
+        paginator = CursorPaginator(queryset, _limit(request), keys, scope)
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            return _error('Неверный курсор.', 400)
+        return _json({
+            'results': [serialize_post(post) for post in page],
+            'next': page.next_cursor,
+        })
+
+    return conditional_response(
+        request, feed_validators(queryset, keys, *parts), render
+    )
+
+
+@query_budget(4)
+def index(request):
+    return _feed(request, Post.objects.all())
+
+
+@query_budget(5)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return _error('Сообщество не найдено.', 404)
+    return _feed(request, Post.objects.filter(group_id=group_id))
+
+
+@query_budget(5)
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return _error('Пользователь не найден.', 404)
+    return _feed(request, Post.objects.filter(author_id=author_id))
+
+
+@query_budget(9)
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error('Нужна авторизация.', 401)
+    post_list, pagination = timeline.feed(request.user)
+    # Подписки входят в валидатор: отписка тоже меняет ленту
+    follows = request.user.follower.order_by('-pk').values_list(
+        'pk', flat=True
+    )
+    response = _feed(request, post_list, **pagination, parts=(
+        request.user.pk, follows.count(), follows.first()
+    ))
+    response['Vary'] = 'Cookie'
+    return response
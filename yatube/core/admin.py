@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import QueuedTask
+
+
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "status", "attempts", "run_at", "created")
+    list_filter = ("status", "name")
+    search_fields = ("last_error",)
+
+
+admin.site.register(QueuedTask, QueuedTaskAdmin)
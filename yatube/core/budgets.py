@@ -0,0 +1,68 @@
+"""
+Бюджеты SQL-запросов представлений. @query_budget(n) объявляет,
+сколько запросов может сделать весь HTTP-запрос к представлению
+(вместе с сессией и пользователем), MetricsMiddleware проверяет.
+"""
+import logging
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .metrics import request_metrics
+
+logger = logging.getLogger('yatube.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(queries):
+    """
+    Декоратор представления; ставить самым внешним, чтобы
+    атрибут был на той функции, что попадёт в urls.py.
+    """
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Разовая работа внутри запроса — пересчёт недостающих счётчиков,
+    фоновая задача, выполненная на месте, — в метриках видна,
+    но в бюджет представления не входит.
+    """
+    metrics = request_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics['unbudgeted'] += 1
+    try:
+        yield
+    finally:
+        metrics['unbudgeted'] -= 1
+
+
+def get_budget(view):
+    return getattr(view, 'query_budget', None)
+
+
+def check_budget(view_name, budget, queries):
+    """
+    True, если бюджет превышен. С QUERY_BUDGET_STRICT (разработка
+    и тесты) превышение — исключение, иначе предупреждение в лог
+    для доли QUERY_BUDGET_LOG_SAMPLE_RATE нарушений.
+    """
+    if budget is None or queries <= budget:
+        return False
+    message = (f'{view_name}: {queries} SQL-запросов '
+               f'при бюджете {budget}')
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    if random.random() < settings.QUERY_BUDGET_LOG_SAMPLE_RATE:
+        logger.warning(message)
+    return True
@@ -0,0 +1,45 @@
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import metrics
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    PRAGMAS из настроек базы SQLite — при каждом новом соединении.
+    """
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """
+    CONN_HEALTH_CHECKS для Django 3.2: постоянное соединение, которое
+    успело умереть (перезапуск базы, таймаут PgBouncer), закрываем
+    до того, как запрос на нём упадёт. Проверка — раз на реквест.
+    """
+    for conn in connections.all():
+        if (conn.settings_dict.get('CONN_HEALTH_CHECKS')
+                and conn.connection is not None
+                and not conn.in_atomic_block
+                and not conn.is_usable()):
+            conn.close()
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """
+    Счётчик SQL для MetricsMiddleware. Ставится на соединение, а не
+    на запрос: так считаются и запросы из потоков async-представлений.
+    """
+    # Обёртка живёт на объекте соединения и переживает переподключение
+    if metrics.time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(metrics.time_queries)
@@ -0,0 +1,76 @@
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.utils import ConnectionHandler
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает настройки базы: новое соединение на каждый запрос '
+            'против постоянного, и для SQLite — запись с PRAGMAS '
+            '(WAL, synchronous=NORMAL, mmap) и без них.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alias', default='default',
+                            help='Какую базу из DATABASES мерить.')
+        parser.add_argument('--repeat', type=int, default=500)
+
+    def handle(self, *args, **options):
+        base = settings.DATABASES[options['alias']]
+        repeat = options['repeat']
+        self.stdout.write(f'{"mode":<22} {"connect+query":>14} '
+                          f'{"query":>8} {"commit":>8}   (мс, медиана)')
+        if base['ENGINE'] != 'django.db.backends.sqlite3':
+            self._report(options['alias'], base, repeat, writes=False)
+            return
+        with tempfile.TemporaryDirectory() as directory:
+            for mode, pragmas in (('sqlite default', {}),
+                                  ('sqlite PRAGMAS', base.get('PRAGMAS'))):
+                self._report(mode, {
+                    **base, 'PRAGMAS': pragmas,
+                    'NAME': os.path.join(directory, f'{len(pragmas)}.db'),
+                }, repeat, writes=True)
+
+    def _report(self, mode, settings_dict, repeat, writes):
+        connection = ConnectionHandler({'default': settings_dict})['default']
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('CREATE TABLE IF NOT EXISTS bench_db '
+                               '(id INTEGER PRIMARY KEY, text TEXT)')
+            connection.close()
+            reconnect = self._measure(lambda: self._query(connection, True),
+                                      repeat)
+            query = self._measure(lambda: self._query(connection, False),
+                                  repeat)
+            commit = '-'
+            if writes:
+                commit = '{:8.3f}'.format(self._measure(
+                    lambda: self._insert(connection), repeat
+                ))
+            self.stdout.write(f'{mode:<22} {reconnect:>14.3f} '
+                              f'{query:>8.3f} {commit:>8}')
+        finally:
+            connection.close()
+
+    def _query(self, connection, reconnect):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM bench_db')
+            cursor.fetchone()
+        if reconnect:
+            connection.close()
+
+    def _insert(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('INSERT INTO bench_db (text) VALUES (%s)',
+                           ['bench'])
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+
+from core.metrics import task_snapshot
+from core.tasks import DatabaseBroker
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _work(burst, stop, results):
+    # Ctrl+C получает вся группа процессов — останавливает родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        DatabaseBroker().work(burst=burst, stop=stop)
+    finally:
+        connections.close_all()
+        results.put(task_snapshot())
+
+
+class Command(BaseCommand):
+    help = ('Обработчик очереди задач DatabaseBroker (YATUBE_TASK_BROKER='
+            'database): --processes процессов берут задачи из базы, '
+            'пока их не остановят. При выходе печатает время задач.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--burst', action='store_true',
+                            help='Выйти, когда очередь опустеет.')
+
+    def handle(self, *args, **options):
+        # Дочерним процессам нельзя наследовать открытые соединения
+        connections.close_all()
+        stop = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_work,
+                                    args=(options['burst'], stop, results))
+            for _ in range(options['processes'])
+        ]
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        for worker in workers:
+            worker.start()
+        try:
+            snapshots = [results.get() for _ in workers]
+        except KeyboardInterrupt:
+            stop.set()
+            snapshots = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        self._report(snapshots)
+
+    def _report(self, snapshots):
+        totals = {}
+        for snapshot in snapshots:
+            for name, metrics in snapshot.items():
+                total = totals.setdefault(name, [0, 0, 0])
+                total[0] += metrics['ok']
+                total[1] += metrics['error']
+                total[2] += metrics['duration_ms'][3]
+        self.stdout.write(f'{"task":<40} {"ok":>6} {"errors":>7} '
+                          f'{"avg, ms":>9}')
+        for name, (ok, errors, sum_ms) in sorted(totals.items()):
+            self.stdout.write(f'{name:<40} {ok:>6} {errors:>7} '
+                              f'{sum_ms / max(ok + errors, 1):>9.1f}')
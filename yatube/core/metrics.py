@@ -0,0 +1,190 @@
+"""
+Метрики запросов в памяти процесса: гистограммы по имени
+представления, которые MetricsMiddleware наполняет, а /metrics/
+отдаёт в текстовом формате Prometheus. Так же по имени задачи —
+время фоновых задач core.tasks.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+# Границы корзин: миллисекунды для времени, штуки для запросов к базе
+TIME_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+HISTOGRAMS = {
+    'duration_ms': TIME_BUCKETS,
+    'sql_ms': TIME_BUCKETS,
+    'template_ms': TIME_BUCKETS,
+    'queries': COUNT_BUCKETS,
+    'response_bytes': SIZE_BUCKETS,
+}
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT',
+                          'RELEASE SAVEPOINT')
+
+COUNTERS = ('cache_hits', 'cache_misses', 'budget_exceeded')
+TASK_OUTCOMES = ('ok', 'error')
+
+# Изменяемый словарь текущего запроса: sync_to_async копирует
+# контекст в поток, и записи из потока видны middleware
+request_metrics = ContextVar('request_metrics', default=None)
+
+
+def new_request_metrics():
+    return {'queries': 0, 'sql_ms': 0.0, 'template_ms': 0.0,
+            'cache_hits': 0, 'cache_misses': 0, 'budget_exceeded': 0,
+            'unbudgeted': 0, 'unbudgeted_queries': 0}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += 1
+        self.sum += value
+
+
+_histograms = {}
+_counters = {}
+_task_histograms = {}
+_task_counters = {}
+_lock = threading.Lock()
+
+
+def record(view, values):
+    """Добавляет замеры одного запроса к гистограммам представления."""
+    with _lock:
+        for name, buckets in HISTOGRAMS.items():
+            histogram = _histograms.get((view, name))
+            if histogram is None:
+                histogram = _histograms[(view, name)] = Histogram(buckets)
+            histogram.observe(values[name])
+        for name in COUNTERS:
+            _counters[(view, name)] = (_counters.get((view, name), 0)
+                                       + values[name])
+
+
+def record_task(name, duration_ms, outcome):
+    """Добавляет время одного выполнения задачи, outcome — 'ok' или 'error'."""
+    with _lock:
+        histogram = _task_histograms.get(name)
+        if histogram is None:
+            histogram = _task_histograms[name] = Histogram(TIME_BUCKETS)
+        histogram.observe(duration_ms)
+        _task_counters[(name, outcome)] = (
+            _task_counters.get((name, outcome), 0) + 1
+        )
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _task_histograms.clear()
+        _task_counters.clear()
+
+
+def snapshot():
+    """
+    {представление: {метрика: (корзины, счётчики, число, сумма)
+    или значение счётчика}}.
+    """
+    result = {}
+    with _lock:
+        for (view, name), histogram in _histograms.items():
+            result.setdefault(view, {})[name] = (
+                histogram.buckets, list(histogram.counts),
+                histogram.total, histogram.sum
+            )
+        for (view, name), value in _counters.items():
+            result.setdefault(view, {})[name] = value
+    return result
+
+
+def task_snapshot():
+    """
+    {задача: {'duration_ms': (корзины, счётчики, число, сумма),
+    'ok': выполнено раз, 'error': упала раз}}.
+    """
+    result = {}
+    with _lock:
+        for name, histogram in _task_histograms.items():
+            result[name] = {'duration_ms': (
+                histogram.buckets, list(histogram.counts),
+                histogram.total, histogram.sum
+            )}
+            for outcome in TASK_OUTCOMES:
+                result[name][outcome] = _task_counters.get((name, outcome), 0)
+    return result
+
+
+def _render_histogram(lines, metric, label, value, histogram):
+    buckets, counts, total, sum_ = histogram
+    cumulative = 0
+    for bound, count in zip(buckets, counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}}'
+                     f' {cumulative}')
+    lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {total}')
+    lines.append(f'{metric}_sum{{{label}="{value}"}} {sum_:g}')
+    lines.append(f'{metric}_count{{{label}="{value}"}} {total}')
+
+
+def render_prometheus():
+    lines = []
+    data = sorted(snapshot().items())
+    for name in HISTOGRAMS:
+        metric = f'yatube_request_{name}'
+        lines.append(f'# TYPE {metric} histogram')
+        for view, metrics in data:
+            _render_histogram(lines, metric, 'view', view, metrics[name])
+    for name in COUNTERS:
+        metric = f'yatube_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for view, metrics in data:
+            lines.append(f'{metric}{{view="{view}"}} {metrics[name]}')
+    tasks = sorted(task_snapshot().items())
+    lines.append('# TYPE yatube_task_duration_ms histogram')
+    for task, metrics in tasks:
+        _render_histogram(lines, 'yatube_task_duration_ms', 'task', task,
+                          metrics['duration_ms'])
+    lines.append('# TYPE yatube_tasks_total counter')
+    for task, metrics in tasks:
+        for outcome in TASK_OUTCOMES:
+            lines.append(f'yatube_tasks_total{{task="{task}",'
+                         f'outcome="{outcome}"}} {metrics[outcome]}')
+    return '\n'.join(lines) + '\n'
+
+
+def time_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper каждого соединения (см. core.db): число
+    и время SQL-запросов текущего HTTP-запроса.
+    """
+    metrics = request_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics['sql_ms'] += (time.perf_counter() - started) * 1000
+        # Управление транзакцией — не запросы к данным, а SAVEPOINT
+        # в тестах ещё и лишние: там всё внутри внешнего atomic
+        if not sql.startswith(TRANSACTION_STATEMENTS):
+            metrics['queries'] += 1
+            if metrics['unbudgeted']:
+                metrics['unbudgeted_queries'] += 1
+
+
+def count_cache(hit):
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics['cache_hits' if hit else 'cache_misses'] += 1
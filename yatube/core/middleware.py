@@ -0,0 +1,90 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from . import metrics
+from .budgets import check_budget, get_budget
+from .routers import request_state
+
+logger = logging.getLogger('yatube.requests')
+
+# Пока кука жива, браузер читает с основной базы и видит свои записи
+PRIMARY_COOKIE = 'yatube_primary'
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает ReplicaRouter читать с реплики в GET-запросах
+    к REPLICA_VIEWS. После записи ставит куку, и ещё
+    REPLICA_STICKY_SECONDS чтение этого клиента идёт с основной базы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'replica': False, 'wrote': False}
+        token = request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_state.reset(token)
+        if state['wrote']:
+            response.set_cookie(PRIMARY_COOKIE, '1',
+                                max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request_state.get()['replica'] = (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+            and PRIMARY_COOKIE not in request.COOKIES
+        )
+
+
+class MetricsMiddleware:
+    """
+    Для каждого запроса собирает время ответа, число и время
+    SQL-запросов, время рендеринга шаблонов, попадания в кэш и размер
+    ответа. Складывает их в гистограммы core.metrics, а долю
+    METRICS_LOG_SAMPLE_RATE (и все медленнее METRICS_SLOW_MS)
+    пишет в лог yatube.requests одной строкой JSON. Проверяет
+    бюджет запросов представления (core.budgets).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        values = metrics.new_request_metrics()
+        token = metrics.request_metrics.set(values)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.request_metrics.reset(token)
+        values['duration_ms'] = (time.perf_counter() - started) * 1000
+        values['response_bytes'] = (
+            0 if response.streaming else len(response.content)
+        )
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        values['budget_exceeded'] = int(check_budget(
+            view, get_budget(match.func) if match else None,
+            values['queries'] - values['unbudgeted_queries']
+        ))
+        metrics.record(view, values)
+        if (values['duration_ms'] >= settings.METRICS_SLOW_MS
+                or random.random() < settings.METRICS_LOG_SAMPLE_RATE):
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                **{name: round(value, 2) if isinstance(value, float)
+                   else value for name, value in values.items()},
+            }))
+        return response
@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedTask(models.Model):
+    """Задача в очереди DatabaseBroker (см. core.tasks)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = ((QUEUED, 'В очереди'), (RUNNING, 'Выполняется'),
+                (FAILED, 'Не выполнена'))
+
+    name = models.CharField('Задача', max_length=200)
+    args = models.JSONField('Аргументы', default=list)
+    status = models.CharField('Состояние', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    # Для задачи в очереди — когда её можно брать, для выполняемой —
+    # когда истечёт аренда и задачу заберёт другой обработчик
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    created = models.DateTimeField('Поставлена', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name}{tuple(self.args)}: {self.status}'
@@ -0,0 +1,134 @@
+"""
+Ограничение частоты записей: скользящее окно по пользователю
+и по IP-адресу в общем кэше. Окно считается по двум соседним
+фиксированным: число запросов в текущем плюс доля предыдущего,
+которая ещё попадает в окно, — O(1) операций кэша на запрос.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+KEY_PREFIX = 'ratelimit'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def client_ip(request):
+    """
+    Адрес клиента из RATE_LIMIT_IP_HEADER. В X-Forwarded-For через
+    запятую идут все узлы цепочки, и левые клиент может подделать —
+    берём правый, его дописал наш прокси.
+    """
+    value = request.META.get(settings.RATE_LIMIT_IP_HEADER,
+                             request.META.get('REMOTE_ADDR', ''))
+    return value.rsplit(',', 1)[-1].strip()
+
+
+def _key(ident, window):
+    return f'{KEY_PREFIX}:{ident}:{window}'
+
+
+def _increment(key, timeout):
+    """Увеличивает счётчик и возвращает его новое значение."""
+    if cache.add(key, 1, timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Ключ истёк между add и incr
+        cache.add(key, 1, timeout)
+        return 1
+
+
+def _decrement(key):
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass
+
+
+def retry_after(current, previous, limit, period, elapsed):
+    """
+    0, если в окне есть место, иначе через сколько секунд оно появится.
+    current и previous — счётчики текущего и предыдущего фиксированных
+    окон, elapsed — сколько секунд прошло от начала текущего.
+    """
+    if current + previous * (1 - elapsed / period) < limit:
+        return 0
+    if current >= limit:
+        return max(1, math.ceil(period - elapsed))
+    # Ждём, пока доля предыдущего окна не уменьшится до свободного места
+    free_at = period * (1 - (limit - current) / previous)
+    return max(1, math.ceil(free_at - elapsed))
+
+
+def check(request, scope, now=None):
+    """
+    Проверяет лимиты RATE_LIMITS[scope]: 'user' — для вошедшего
+    пользователя, 'ip' — для адреса клиента. Разрешённый запрос
+    учитывает во всех окнах и возвращает 0, запрещённый не учитывает
+    и возвращает секунды до повтора. Счётчик сначала увеличивается,
+    а решение принимается по его новому значению: из одновременных
+    запросов каждый видит своё, и лимит вместе они не превысят.
+    """
+    now = time.time() if now is None else now
+    idents = {'ip': client_ip(request)}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    windows = []
+    for kind, rate in settings.RATE_LIMITS.get(scope, {}).items():
+        if kind not in idents:
+            continue
+        limit, period = parse_rate(rate)
+        window, elapsed = divmod(now, period)
+        ident = f'{scope}:{kind}:{idents[kind]}'
+        windows.append((_key(ident, int(window)),
+                        _key(ident, int(window) - 1),
+                        limit, period, elapsed))
+    if not windows:
+        return 0
+    counts = [_increment(current, period * 2)
+              for current, _, _, period, _ in windows]
+    previous_counts = cache.get_many([previous for _, previous, *_ in windows])
+    # Без этого запроса в текущем окне было на один меньше
+    wait = max(retry_after(count - 1, previous_counts.get(previous, 0),
+                           limit, period, elapsed)
+               for count, (_, previous, limit, period, elapsed)
+               in zip(counts, windows))
+    if wait:
+        for current, *_ in windows:
+            _decrement(current)
+    return wait
+
+
+def too_many_requests(request, wait):
+    response = render(request, 'posts/misc/429.html',
+                      {'retry_after': wait}, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def rate_limit(scope, methods=('POST',)):
+    """
+    Декоратор представления: запросы methods сверх RATE_LIMITS[scope]
+    получают 429 с Retry-After. Ставить под login_required.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in methods:
+                wait = check(request, scope)
+                if wait:
+                    return too_many_requests(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+
+DEFAULT = 'default'
+REPLICA = 'replica'
+# Сессии только что вошедшего пользователя на реплике может ещё не быть
+PRIMARY_ONLY_APPS = ('sessions',)
+
+# Состояние текущего запроса: {'replica': можно ли читать с реплики,
+# 'wrote': была ли запись}. Изменяемый словарь, а не отдельные
+# значения, чтобы запись из sync_to_async была видна middleware.
+request_state = ContextVar('replica_request_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Чтение в представлениях, отмеченных ReplicaMiddleware, — с реплики,
+    всё остальное и любая запись — с основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if (state and state['replica'] and not state['wrote']
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return REPLICA
+        return DEFAULT
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,241 @@
+"""
+Фоновые задачи: представление ставит работу в очередь и отвечает,
+не дожидаясь её. Задача — функция с декоратором @task, вызывается
+как обычно или ставится в очередь через .delay(*args) с аргументами,
+которые сериализуются в JSON.
+
+Куда уходит задача, решает TASK_BROKER:
+ImmediateBroker — выполняет её в том же запросе после коммита
+(разработка и тесты), ThreadBroker — в пуле потоков процесса,
+DatabaseBroker — кладёт в таблицу core_queuedtask, откуда её берут
+обработчики manage.py run_tasks. После сбоя обработчика задача
+может выполниться повторно, поэтому задачи должны быть идемпотентны.
+"""
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import update_wrapper
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .budgets import unbudgeted
+from .models import QueuedTask
+
+logger = logging.getLogger('yatube.tasks')
+
+
+class Task:
+    def __init__(self, func, retries):
+        update_wrapper(self, func)
+        self.func = func
+        self.retries = retries
+        self.name = f'{func.__module__}.{func.__name__}'
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def delay(self, *args):
+        get_broker().enqueue(self, args)
+
+
+def task(retries=None):
+    """
+    Декоратор задачи. retries — сколько раз повторять упавшую задачу,
+    по умолчанию TASK_RETRIES.
+    """
+    def decorator(func):
+        return Task(func, retries)
+    return decorator
+
+
+def max_retries(task):
+    return settings.TASK_RETRIES if task.retries is None else task.retries
+
+
+def retry_delay(attempt):
+    """Пауза перед повтором после attempt-й попытки: 1, 2, 4... × задержка."""
+    return settings.TASK_RETRY_DELAY * 2 ** (attempt - 1)
+
+
+def execute(task, args):
+    """Выполняет задачу, записывая её время в метрики."""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        result = task(*args)
+        outcome = 'ok'
+        return result
+    finally:
+        metrics.record_task(task.name,
+                            (time.perf_counter() - started) * 1000, outcome)
+
+
+class ImmediateBroker:
+    def enqueue(self, task, args):
+        # Отложенная работа не входит в бюджет запросов представления
+        def run():
+            with unbudgeted():
+                execute(task, args)
+        transaction.on_commit(run)
+
+
+class ThreadBroker:
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.TASK_THREADS,
+                    thread_name_prefix='task'
+                )
+            return self._executor
+
+    def enqueue(self, task, args):
+        transaction.on_commit(lambda: self._submit(task, args, 1))
+
+    def _submit(self, task, args, attempt):
+        self._get_executor().submit(self._run, task, args, attempt)
+
+    def _run(self, task, args, attempt):
+        try:
+            execute(task, args)
+        except Exception:
+            if attempt > max_retries(task):
+                logger.exception('Задача %s%r не выполнена', task.name, args)
+                return
+            logger.warning('Задача %s%r упала, попытка %s',
+                           task.name, args, attempt, exc_info=True)
+            # Паузу ждёт таймер, а не поток пула: он нужен другим задачам
+            timer = threading.Timer(retry_delay(attempt), self._submit,
+                                    (task, args, attempt + 1))
+            timer.daemon = True
+            timer.start()
+        finally:
+            connection.close()
+
+
+class DatabaseBroker:
+    def enqueue(self, task, args):
+        # В той же транзакции, что и данные: откат отменит и задачу
+        QueuedTask.objects.create(name=task.name, args=list(args))
+
+    def claim(self):
+        """
+        Забирает одну готовую задачу или None. Задача «выполняется»
+        с истёкшей арендой брошена упавшим или зависшим обработчиком
+        и тоже готова, но если попытки на неё кончились — помечается
+        failed. Условный UPDATE отдаёт каждую задачу ровно одному
+        обработчику без блокировок, поэтому работает и на SQLite.
+        """
+        now = timezone.now()
+        ready = QueuedTask.objects.filter(
+            status__in=(QueuedTask.QUEUED, QueuedTask.RUNNING),
+            run_at__lte=now
+        )
+        for pk in ready.order_by('run_at').values_list('pk', flat=True)[:10]:
+            claimed = ready.filter(pk=pk).update(
+                status=QueuedTask.RUNNING,
+                run_at=now + timedelta(seconds=settings.TASK_LEASE),
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                queued = QueuedTask.objects.get(pk=pk)
+                if not self._exhausted(queued):
+                    return queued
+        return None
+
+    def _get_task(self, queued):
+        task = import_string(queued.name)
+        if not isinstance(task, Task):
+            raise ImportError(f'{queued.name} — не задача')
+        return task
+
+    def _exhausted(self, queued):
+        """Попытки кончились — отмечает задачу failed, не запуская."""
+        try:
+            retries = max_retries(self._get_task(queued))
+        except ImportError:
+            # Неизвестную задачу отметит process
+            return False
+        if queued.attempts <= retries + 1:
+            return False
+        logger.error('Задача %s не выполнена: истекла аренда, попыток %s',
+                     queued, queued.attempts - 1)
+        self._fail(queued, queued.last_error or 'Истекла аренда задачи.')
+        return True
+
+    def process(self, queued):
+        try:
+            task = self._get_task(queued)
+        except ImportError:
+            logger.exception('Неизвестная задача %s', queued.name)
+            self._fail(queued, traceback.format_exc())
+            return False
+        try:
+            execute(task, queued.args)
+        except Exception:
+            error = traceback.format_exc()
+            if queued.attempts > max_retries(task):
+                logger.exception('Задача %s не выполнена', queued)
+                self._fail(queued, error)
+            else:
+                logger.warning('Задача %s упала, попытка %s', queued,
+                               queued.attempts, exc_info=True)
+                QueuedTask.objects.filter(pk=queued.pk).update(
+                    status=QueuedTask.QUEUED, last_error=error,
+                    run_at=timezone.now() + timedelta(
+                        seconds=retry_delay(queued.attempts)
+                    )
+                )
+            return False
+        QueuedTask.objects.filter(pk=queued.pk).delete()
+        return True
+
+    def _fail(self, queued, error):
+        QueuedTask.objects.filter(pk=queued.pk).update(
+            status=QueuedTask.FAILED, last_error=error
+        )
+
+    def work(self, burst=False, stop=None):
+        """
+        Выполняет задачи, пока не выставлен stop (threading.Event или
+        multiprocessing.Event), а с burst — пока очередь не опустеет.
+        Возвращает число выполненных задач.
+        """
+        done = 0
+        while stop is None or not stop.is_set():
+            queued = self.claim()
+            if queued is not None:
+                done += self.process(queued)
+            elif burst:
+                break
+            elif stop is not None:
+                stop.wait(settings.TASK_POLL_INTERVAL)
+            else:
+                time.sleep(settings.TASK_POLL_INTERVAL)
+        return done
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    with _brokers_lock:
+        broker = _brokers.get(settings.TASK_BROKER)
+        if broker is None:
+            broker = _brokers[settings.TASK_BROKER] = import_string(
+                settings.TASK_BROKER
+            )()
+        return broker
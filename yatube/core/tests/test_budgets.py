@@ -0,0 +1,141 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from groups.models import Group
+from posts import views
+from posts.models import Comment, Post
+
+from core import metrics
+from core.budgets import QueryBudgetExceeded, check_budget, get_budget
+
+User = get_user_model()
+
+# Приложения, у представлений которых должен быть бюджет
+BUDGETED_APPS = ('posts.', 'groups.', 'api.')
+
+
+def own_patterns(patterns, namespace=''):
+    """Пары (имя для reverse, шаблон) представлений BUDGETED_APPS."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = (f'{namespace}{pattern.namespace}:'
+                      if pattern.namespace else namespace)
+            yield from own_patterns(pattern.url_patterns, prefix)
+        elif (isinstance(pattern, URLPattern)
+              and pattern.lookup_str.startswith(BUDGETED_APPS)):
+            yield f'{namespace}{pattern.name}', pattern
+
+
+class QueryBudgetTest(SimpleTestCase):
+    def test_every_view_has_budget(self):
+        """У каждого представления постов, групп и API есть бюджет"""
+        for _, pattern in own_patterns(get_resolver().url_patterns):
+            with self.subTest(view=pattern.lookup_str):
+                self.assertIsNotNone(get_budget(pattern.callback))
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict(self):
+        """При разработке и в тестах превышение — исключение"""
+        self.assertFalse(check_budget('index', 6, 6))
+        with self.assertRaises(QueryBudgetExceeded):
+            check_budget('index', 6, 7)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_logged_in_production(self):
+        """В бою превышение пишется в лог"""
+        with self.assertLogs('yatube.query_budget', 'WARNING') as logs:
+            self.assertTrue(check_budget('index', 6, 7))
+        self.assertIn('index: 7', logs.output[0])
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_violation_counted(self):
+        """Превышение видно в метриках представления"""
+        with mock.patch.object(views.index, 'query_budget', 0), \
+                self.assertLogs('yatube.query_budget', 'WARNING'):
+            self.client.get(reverse('index'))
+        self.assertEqual(metrics.snapshot()['index']['budget_exceeded'], 1)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_stats_rebuild_unbudgeted(self):
+        """Разовый пересчёт UserStats не в счёт бюджета, но в метриках"""
+        author = User.objects.create_user(username='NoStats')
+        self.client.force_login(author)
+        self.client.get(reverse('profile', kwargs={'username': 'NoStats'}))
+        profile = metrics.snapshot()['profile']
+        _, _, _, queries = profile['queries']
+        self.assertGreater(queries, get_budget(views.profile))
+
+
+# Параметры, без которых страница пустая
+QUERY_STRINGS = {'search': '?q=пост'}
+
+
+def load_user(get_response):
+    """
+    Загружает сессию и пользователя в каждом запросе, как debug
+    toolbar при DEBUG: бюджет должен выдерживать и такой запрос.
+    """
+    def middleware(request):
+        request.user.is_authenticated
+        return get_response(request)
+    return middleware
+
+
+def with_load_user(middleware):
+    auth = middleware.index(
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+    )
+    return (middleware[:auth + 1] + [f'{__name__}.load_user']
+            + middleware[auth + 1:])
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, RATE_LIMIT_ENABLED=False,
+                   MIDDLEWARE=with_load_user(settings.MIDDLEWARE))
+class ViewsWithinBudgetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=group)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+
+    def check_views(self, user):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        kwargs = {'username': self.author.username,
+                  'post_id': self.post.pk, 'slug': 'group'}
+        for name, pattern in own_patterns(get_resolver().url_patterns):
+            url = reverse(name, kwargs={
+                key: kwargs[key] for key in pattern.pattern.converters
+            }) + QUERY_STRINGS.get(name, '')
+            with self.subTest(view=name):
+                cache.clear()
+                # Строгий режим: превышение — исключение из get()
+                response = client.get(url)
+                self.assertLess(response.status_code, 500)
+
+    def test_anonymous(self):
+        self.check_views(None)
+
+    def test_reader(self):
+        # profile_follow идёт раньше profile_unfollow: в первом проходе
+        # читатель подписывается, во втором — уже подписан и отписывается
+        self.check_views(self.reader)
+        self.check_views(self.reader)
+
+    def test_author(self):
+        self.check_views(self.author)
@@ -0,0 +1,38 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db import check_connections
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA SQLite')
+class PragmasTest(TestCase):
+    def test_pragmas_applied(self):
+        """PRAGMAS из настроек выполнены на соединении"""
+        # В тестовой базе в памяти WAL и mmap не применимы
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+
+class HealthCheckTest(SimpleTestCase):
+    def fake_connection(self, usable, health_checks=True):
+        return mock.Mock(settings_dict={'CONN_HEALTH_CHECKS': health_checks},
+                         connection=object(), in_atomic_block=False,
+                         **{'is_usable.return_value': usable})
+
+    def test_dead_connection_closed(self):
+        """Умершее постоянное соединение закрывается в начале запроса"""
+        dead = self.fake_connection(usable=False)
+        alive = self.fake_connection(usable=True)
+        unchecked = self.fake_connection(usable=False, health_checks=False)
+        with mock.patch('core.db.connections') as connections:
+            connections.all.return_value = [dead, alive, unchecked]
+            check_connections()
+        dead.close.assert_called_once()
+        alive.close.assert_not_called()
+        unchecked.close.assert_not_called()
+        unchecked.is_usable.assert_not_called()
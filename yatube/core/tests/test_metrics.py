@@ -0,0 +1,85 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+from core import metrics
+
+User = get_user_model()
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='PavelZ')
+        Post.objects.create(text='Пост для метрик', author=author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_request_recorded(self):
+        """Время, SQL, шаблоны, кэш и размер — по имени представления"""
+        self.client.get(reverse('index'))
+        self.client.get(reverse('index'))
+        index = metrics.snapshot()['index']
+        _, _, count, _ = index['duration_ms']
+        self.assertEqual(count, 2)
+        for name in ('queries', 'sql_ms', 'template_ms', 'response_bytes'):
+            with self.subTest(metric=name):
+                _, _, _, total = index[name]
+                self.assertGreater(total, 0)
+        # Первый запрос вычислил фрагменты, второй взял их из кэша
+        self.assertGreater(index['cache_misses'], 0)
+        self.assertGreater(index['cache_hits'], 0)
+
+    @override_settings(METRICS_LOG_SAMPLE_RATE=1)
+    def test_sampled_log(self):
+        """Попавший в выборку запрос пишется в лог одной строкой JSON"""
+        with self.assertLogs('yatube.requests') as logs:
+            self.client.get(reverse('index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+
+    def test_endpoint(self):
+        """/metrics/ отдаёт гистограммы только разрешённым адресам"""
+        self.client.get(reverse('index'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, 'yatube_request_duration_ms_count{view="index"} 1'
+        )
+        self.assertContains(response, 'yatube_request_queries_bucket'
+                                      '{view="index",le="+Inf"} 1')
+        outsider = Client(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(outsider.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_endpoint_behind_proxy(self):
+        """За прокси решает адрес клиента, а не адрес самого прокси"""
+        proxied = Client(REMOTE_ADDR='127.0.0.1')
+        response = proxied.get(reverse('metrics'),
+                               HTTP_X_FORWARDED_FOR='127.0.0.1, 10.0.0.1')
+        self.assertEqual(response.status_code, 404)
+        response = proxied.get(reverse('metrics'),
+                               HTTP_X_FORWARDED_FOR='127.0.0.1')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_token(self):
+        """С токеном адрес не важен, без него не пускает и локальных"""
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(
+            url, HTTP_AUTHORIZATION='Bearer wrong'
+        ).status_code, 404)
+        outsider = Client(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(outsider.get(
+            url, HTTP_AUTHORIZATION='Bearer secret'
+        ).status_code, 200)
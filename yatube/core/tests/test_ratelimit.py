@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import reverse
+from posts.models import Post
+
+from core import ratelimit
+
+User = get_user_model()
+
+
+class SlidingWindowTest(SimpleTestCase):
+    def test_retry_after(self):
+        """Доля предыдущего окна убывает по мере сдвига текущего"""
+        # 10 в минуту: прошлое окно заполнено, прошло 30 с — занято 5
+        self.assertEqual(ratelimit.retry_after(4, 10, 10, 60, 30), 0)
+        # Занято 6 + 5 = 11: место появится, когда от прошлого окна
+        # останется меньше 4, т. е. на 36-й секунде
+        self.assertEqual(ratelimit.retry_after(6, 10, 10, 60, 30), 6)
+        # Текущее окно заполнено само — ждать его конца
+        self.assertEqual(ratelimit.retry_after(10, 0, 10, 60, 15), 45)
+
+
+@override_settings(RATE_LIMITS={'test': {'ip': '3/m'}})
+class CheckTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/')
+        self.request.user = AnonymousUser()
+
+    def test_window_slides(self):
+        """Лимит в скользящем окне, а не в календарной минуте"""
+        for _ in range(3):
+            self.assertEqual(ratelimit.check(self.request, 'test', now=50), 0)
+        self.assertEqual(ratelimit.check(self.request, 'test', now=55), 5)
+        # Следующая минута: из прошлой в окне 3 * 55/60 = 2,75 запроса
+        self.assertEqual(ratelimit.check(self.request, 'test', now=65), 0)
+        self.assertGreater(ratelimit.check(self.request, 'test', now=66), 0)
+        # К концу минуты прошлое окно почти выпало
+        self.assertEqual(ratelimit.check(self.request, 'test', now=105), 0)
+
+    def test_decided_after_increment(self):
+        """Запрос, одновременный с последним разрешённым, не проходит"""
+        for _ in range(2):
+            ratelimit.check(self.request, 'test', now=50)
+        key = ratelimit._key('test:ip:127.0.0.1', 0)
+        incr = cache.incr
+
+        def concurrent_incr(*args, **kwargs):
+            # Другой процесс успел учесть свой запрос раньше нас
+            incr(key)
+            return incr(*args, **kwargs)
+
+        with mock.patch.object(ratelimit, 'cache', wraps=cache) as spy:
+            spy.incr.side_effect = concurrent_incr
+            self.assertGreater(ratelimit.check(self.request, 'test', now=51),
+                               0)
+        self.assertEqual(cache.get(key), 3)
+
+    def test_constant_cache_calls(self):
+        """Разрешённый запрос — один get_many и один add"""
+        ratelimit.check(self.request, 'test', now=50)
+        with mock.patch.object(ratelimit, 'cache', wraps=cache) as spy:
+            ratelimit.check(self.request, 'test', now=51)
+        self.assertEqual(spy.get_many.call_count, 1)
+        self.assertEqual(spy.add.call_count + spy.incr.call_count, 2)
+
+
+@override_settings(RATE_LIMITS={
+    'new_post': {'user': '2/m', 'ip': '3/m'},
+    'signup': {'ip': '1/h'},
+})
+class RateLimitViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.other = User.objects.create_user(username='Other')
+
+    def setUp(self):
+        cache.clear()
+
+    def client_for(self, user, ip='10.0.0.1'):
+        client = Client(REMOTE_ADDR=ip)
+        client.force_login(user)
+        return client
+
+    def test_per_user_and_ip(self):
+        """Сверх лимита — 429 с Retry-After, пост не создаётся"""
+        client = self.client_for(RateLimitViewsTest.user)
+        for _ in range(2):
+            client.post(reverse('new_post'), {'text': 'Пост'})
+        response = client.post(reverse('new_post'), {'text': 'Лишний'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertFalse(Post.objects.filter(text='Лишний').exists())
+        # Страницу формы лимит не трогает
+        self.assertEqual(client.get(reverse('new_post')).status_code, 200)
+
+        # У другого пользователя свой лимит, но адрес тот же: 3 в минуту
+        other = self.client_for(RateLimitViewsTest.other)
+        response = other.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 302)
+        response = other.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+        elsewhere = self.client_for(RateLimitViewsTest.other, ip='10.0.0.2')
+        response = elsewhere.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_forwarded_for_last_hop(self):
+        """Из X-Forwarded-For берётся адрес, дописанный прокси"""
+        request = RequestFactory().get(
+            '/', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.5'
+        )
+        self.assertEqual(ratelimit.client_ip(request), '10.0.0.5')
+        # Подделанный левый адрес не даёт обойти лимит
+        for spoofed in ('1.1.1.1', '2.2.2.2', '3.3.3.3', '4.4.4.4'):
+            client = Client(HTTP_X_FORWARDED_FOR=f'{spoofed}, 10.0.0.5')
+            client.force_login(User.objects.create_user(username=spoofed))
+            response = client.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(response.status_code, 429)
+
+    def test_signup(self):
+        """Регистрация ограничена по адресу"""
+        client = Client(REMOTE_ADDR='10.0.0.3')
+        data = {'first_name': 'Иван', 'last_name': 'Иванов',
+                'username': 'ivan', 'email': 'ivan@example.com',
+                'password1': 'Secret-pass-123', 'password2': 'Secret-pass-123'}
+        response = client.post(reverse('signup'), data)
+        self.assertEqual(response.status_code, 302)
+        data['username'] = 'ivan2'
+        response = client.post(reverse('signup'), data)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(User.objects.filter(username='ivan2').exists())
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        client = self.client_for(RateLimitViewsTest.user)
+        for _ in range(3):
+            response = client.post(reverse('new_post'), {'text': 'Пост'})
+            self.assertEqual(response.status_code, 302)
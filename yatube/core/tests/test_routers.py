@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+from core.middleware import PRIMARY_COOKIE
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_ROUTERS=['core.routers.ReplicaRouter'])
+class ReplicaRouterTest(TestCase):
+    """
+    Две тестовые базы SQLite: основная и «реплика», которая не получает
+    изменений, поэтому по содержимому видно, откуда шло чтение.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='PavelZ')
+        # Та же строка на «реплике», иначе не сойдётся хэш сессии
+        author.save(using='replica')
+        Post.objects.using('replica').create(text='Пост на реплике',
+                                             author=author)
+        Post.objects.using('default').create(text='Пост в основной',
+                                             author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(
+            User.objects.get(username='PavelZ')
+        )
+
+    def test_feeds_read_from_replica(self):
+        """Ленты читаются с реплики"""
+        urls = (
+            reverse('index'),
+            reverse('profile', kwargs={'username': 'PavelZ'}),
+            reverse('api:index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertContains(response, 'Пост на реплике')
+                self.assertNotContains(response, 'Пост в основной')
+
+    def test_other_views_read_from_primary(self):
+        """Остальные представления читают основную базу"""
+        post = Post.objects.using('default').get(text='Пост в основной')
+        response = self.author_client.get(reverse('post_edit', kwargs={
+            'username': 'PavelZ', 'post_id': post.pk
+        }))
+        self.assertContains(response, 'Пост в основной')
+
+    def test_reads_stick_to_primary_after_write(self):
+        """После записи автор видит свой пост, пока жива кука"""
+        response = self.author_client.post(reverse('new_post'),
+                                           {'text': 'Новый пост'})
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+        self.assertFalse(Post.objects.using('replica').filter(
+            text='Новый пост'
+        ).exists())
+        self.assertContains(self.author_client.get(reverse('index')),
+                            'Новый пост')
+
+        del self.author_client.cookies[PRIMARY_COOKIE]
+        cache.clear()
+        self.assertNotContains(self.author_client.get(reverse('index')),
+                               'Новый пост')
@@ -0,0 +1,146 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import metrics
+from core.models import QueuedTask
+from core.tasks import DatabaseBroker, ThreadBroker, task
+
+calls = []
+attempts = []
+
+
+@task()
+def remember(value):
+    calls.append(value)
+
+
+@task(retries=1)
+def broken():
+    raise ValueError('сломалась')
+
+
+@task(retries=1)
+def flaky(value):
+    attempts.append(value)
+    if len(attempts) == 1:
+        raise ValueError('первая попытка')
+
+
+def not_a_task():
+    pass
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@override_settings(TASK_BROKER='core.tasks.DatabaseBroker',
+                   TASK_RETRY_DELAY=10)
+class DatabaseBrokerTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        metrics.reset()
+        self.broker = DatabaseBroker()
+
+    def test_delay_and_work(self):
+        """Задача ждёт в базе, обработчик выполняет её и удаляет"""
+        remember.delay('а')
+        remember.delay('б')
+        self.assertEqual(calls, [])
+        self.assertEqual(self.broker.work(burst=True), 2)
+        self.assertEqual(calls, ['а', 'б'])
+        self.assertFalse(QueuedTask.objects.exists())
+        self.assertEqual(metrics.task_snapshot()[remember.name]['ok'], 2)
+
+    def test_rolled_back_with_transaction(self):
+        """Задача из откатившейся транзакции не выполняется"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            remember.delay('откат')
+            raise RuntimeError
+        self.assertFalse(QueuedTask.objects.exists())
+
+    def test_retry_with_backoff_then_fail(self):
+        """Упавшая задача откладывается, после retries — failed"""
+        broken.delay()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            self.assertEqual(self.broker.work(burst=True), 0)
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.status, QueuedTask.QUEUED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('сломалась', queued.last_error)
+        self.assertGreater(queued.run_at,
+                           timezone.now() + timedelta(seconds=9))
+        # Пауза не прошла — брать нечего
+        self.assertIsNone(self.broker.claim())
+
+        QueuedTask.objects.update(run_at=timezone.now())
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.broker.work(burst=True)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedTask.FAILED)
+        self.assertEqual(queued.attempts, 2)
+        self.assertEqual(metrics.task_snapshot()[broken.name]['error'], 2)
+
+    def test_expired_lease_reclaimed(self):
+        """Задачу упавшего обработчика забирает другой"""
+        remember.delay('снова')
+        claimed = self.broker.claim()
+        self.assertIsNone(self.broker.claim())
+        QueuedTask.objects.update(run_at=timezone.now())
+        self.assertEqual(self.broker.claim().pk, claimed.pk)
+
+    def test_abandoned_task_failed(self):
+        """Задачу, брошенную больше раз, чем есть попыток, не берут"""
+        broken.delay()
+        for attempt in (1, 2):
+            self.assertEqual(self.broker.claim().attempts, attempt)
+            QueuedTask.objects.update(run_at=timezone.now())
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.assertIsNone(self.broker.claim())
+        queued = QueuedTask.objects.get()
+        self.assertEqual(queued.status, QueuedTask.FAILED)
+        self.assertIn('аренда', queued.last_error)
+        self.assertIsNone(self.broker.claim())
+
+    def test_unknown_task_failed(self):
+        QueuedTask.objects.create(name=f'{__name__}.not_a_task')
+        QueuedTask.objects.create(name='core.tests.missing')
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.broker.work(burst=True)
+        self.assertEqual(
+            QueuedTask.objects.filter(status=QueuedTask.FAILED).count(), 2
+        )
+
+
+@override_settings(TASK_THREADS=1, TASK_RETRY_DELAY=0.5)
+class ThreadBrokerTest(TestCase):
+    def test_retry_does_not_block_pool(self):
+        """Пока упавшая задача ждёт повтора, поток пула занят другими"""
+        calls.clear()
+        attempts.clear()
+        broker = ThreadBroker()
+        with self.assertLogs('yatube.tasks', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                broker.enqueue(flaky, ('повтор',))
+                broker.enqueue(remember, ('сразу',))
+            self.assertTrue(wait_for(lambda: calls == ['сразу'], 0.4))
+            self.assertEqual(attempts, ['повтор'])
+            self.assertTrue(wait_for(lambda: len(attempts) == 2))
+        broker._executor.shutdown()
+
+
+@override_settings(TASK_BROKER='core.tasks.ImmediateBroker')
+class ImmediateBrokerTest(TestCase):
+    def test_runs_after_commit(self):
+        calls.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            remember.delay('сразу')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['сразу'])
@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post
+
+from core.writebehind import WriteBatcher, WriteTimeout, get_batcher, run_write
+
+User = get_user_model()
+
+
+def create_comment(post_id, author_id, text):
+    return Comment.objects.create(post_id=post_id, author_id=author_id,
+                                  text=text).pk
+
+
+def fail():
+    Comment.objects.create(post_id=None, author_id=None, text='')
+
+
+def block(started, release):
+    started.set()
+    release.wait(5)
+
+
+# Поток-писатель работает со своим соединением и видит только
+# закоммиченное, поэтому без обёртки TestCase в транзакцию
+class WriteBatcherTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        self.batcher = WriteBatcher(interval=0.05, max_batch=100)
+
+    def test_writes_grouped(self):
+        """Одновременные записи коммитятся меньшим числом пачек"""
+        with ThreadPoolExecutor(10) as pool:
+            futures = [pool.submit(lambda i=i: self.batcher.submit(
+                create_comment, self.post.pk, self.user.pk, f'к{i}'
+            ).result(timeout=5)) for i in range(10)]
+            ids = [future.result() for future in futures]
+        self.assertEqual(len(set(ids)), 10)
+        self.assertEqual(Comment.objects.count(), 10)
+        self.assertLess(self.batcher.batches, 10)
+
+    def test_failure_isolated(self):
+        """Ошибка одной записи не откатывает соседние по пачке"""
+        first = self.batcher.submit(create_comment, self.post.pk,
+                                    self.user.pk, 'до')
+        failed = self.batcher.submit(fail)
+        last = self.batcher.submit(create_comment, self.post.pk,
+                                   self.user.pk, 'после')
+        with self.assertRaises(Exception):
+            failed.result(timeout=5)
+        first.result(timeout=5)
+        last.result(timeout=5)
+        self.assertEqual(
+            set(Comment.objects.values_list('text', flat=True)),
+            {'до', 'после'}
+        )
+
+
+@override_settings(WRITE_BATCHING=True, RATE_LIMIT_ENABLED=False)
+class BatchedViewsTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='reader')
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(text='Пост', author=self.author)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_comment_visible_after_redirect(self):
+        """Автор сразу видит свой комментарий, записанный пачкой"""
+        response = self.client.post(
+            reverse('add_comment', args=[self.author.username, self.post.pk]),
+            {'text': 'Свой комментарий'}, follow=True
+        )
+        self.assertContains(response, 'Свой комментарий')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    @override_settings(WRITE_BATCH_TIMEOUT=0.1)
+    def test_timeout_cancels_write(self):
+        """Не дождавшаяся писателя запись отменяется: 503, повтор не задвоит"""
+        started, release = threading.Event(), threading.Event()
+        busy = get_batcher().submit(block, started, release)
+        try:
+            started.wait(5)
+            with self.assertRaises(WriteTimeout):
+                run_write(create_comment, self.post.pk, self.user.pk,
+                          'отменён')
+            response = self.client.post(
+                reverse('add_comment',
+                        args=[self.author.username, self.post.pk]),
+                {'text': 'отменён'}
+            )
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+        finally:
+            release.set()
+        busy.result(timeout=5)
+        run_write(create_comment, self.post.pk, self.user.pk, 'повтор')
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['повтор']
+        )
+
+    def test_follow_visible_after_redirect(self):
+        self.client.get(reverse('profile_follow',
+                                args=[self.author.username]))
+        self.assertTrue(self.user.follower.filter(author=self.author)
+                        .exists())
+        self.client.get(reverse('profile_unfollow',
+                                args=[self.author.username]))
+        self.assertFalse(self.user.follower.exists())
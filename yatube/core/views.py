@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
+from .ratelimit import client_ip
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _allowed(request):
+    # За прокси REMOTE_ADDR у всех запросов — адрес прокси, поэтому
+    # адрес клиента берём так же, как ограничитель частоты
+    if settings.METRICS_TOKEN:
+        return constant_time_compare(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {settings.METRICS_TOKEN}'
+        )
+    return client_ip(request) in settings.METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """
+    Гистограммы запросов этого процесса для Prometheus: с токеном
+    METRICS_TOKEN, если он задан, иначе с адресов METRICS_ALLOWED_IPS.
+    """
+    if not _allowed(request):
+        raise Http404
+    return HttpResponse(metrics.render_prometheus(),
+                        content_type=PROMETHEUS_CONTENT_TYPE)
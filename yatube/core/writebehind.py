@@ -0,0 +1,153 @@
+"""
+Групповая запись для SQLite: мелкие записи из запросов уходят
+одному потоку-писателю, который раз в WRITE_BATCH_INTERVAL
+коммитит их пачкой в одной транзакции. Запрос ждёт коммита своей
+пачки, поэтому после ответа автор видит свою запись. Если писатель
+не взял запись за WRITE_BATCH_TIMEOUT, она отменяется и запрос
+получает 503: повтор не задвоит её.
+"""
+import logging
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.shortcuts import render
+
+from .routers import request_state
+
+logger = logging.getLogger(__name__)
+
+
+class WriteTimeout(Exception):
+    """Писатель не взял запись вовремя, и она отменена."""
+
+
+class WriteBatcher:
+    def __init__(self, interval, max_batch):
+        self.interval = interval
+        self.max_batch = max_batch
+        self.queue = queue.Queue()
+        self.batches = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        """Ставит func(*args) в очередь, результат — в Future."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='write-batcher', daemon=True
+                )
+                self._thread.start()
+        future = Future()
+        self.queue.put((func, args, future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._commit(self._collect())
+
+    def _commit(self, batch):
+        # Отменённые по тайм-ауту записи пропускаем, а взятые в работу
+        # отменить уже нельзя: их запросы дождутся коммита
+        batch = [item for item in batch
+                 if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results = []
+        try:
+            with transaction.atomic():
+                for func, args, future in batch:
+                    # Вложенный atomic — точка сохранения: ошибка одной
+                    # записи откатывает только её
+                    try:
+                        with transaction.atomic():
+                            result = func(*args)
+                    except Exception as exc:
+                        results.append((future, None, exc))
+                    else:
+                        results.append((future, result, None))
+        except DatabaseError as exc:
+            logger.exception('Не удалось записать пачку из %s', len(batch))
+            # Соединение могло умереть — следующая пачка откроет новое
+            connection.close()
+            results = [(future, None, exc) for _, _, future in batch]
+        self.batches += 1
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = WriteBatcher(settings.WRITE_BATCH_INTERVAL,
+                                    settings.WRITE_BATCH_MAX)
+        return _batcher
+
+
+def run_write(func, *args):
+    """
+    Выполняет запись func(*args) в транзакции: с WRITE_BATCHING —
+    в пачке потока-писателя, иначе сразу. Возвращает результат func.
+    Если писатель не взял запись за WRITE_BATCH_TIMEOUT, отменяет её
+    и бросает WriteTimeout.
+    """
+    if not settings.WRITE_BATCHING:
+        with transaction.atomic():
+            return func(*args)
+    state = request_state.get()
+    if state is not None:
+        # Пишет другой поток, но читать этому клиенту — с основной базы
+        state['wrote'] = True
+    future = get_batcher().submit(func, *args)
+    try:
+        return future.result(timeout=settings.WRITE_BATCH_TIMEOUT)
+    except TimeoutError:
+        if future.cancel():
+            raise WriteTimeout(func.__name__)
+    # Запись уже в пачке: она закоммитится, ждём её до конца
+    return future.result()
+
+
+def unavailable_on_timeout(view):
+    """
+    Декоратор представления: WriteTimeout из run_write — ответ 503
+    с Retry-After вместо 500, запись при этом не выполнена.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except WriteTimeout:
+            wait = math.ceil(settings.WRITE_BATCH_TIMEOUT)
+            response = render(request, 'posts/misc/503.html',
+                              {'retry_after': wait}, status=503)
+            response['Retry-After'] = str(wait)
+            return response
+    return wrapper
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
+from posts import async_views
 
 from . import views
 
+feed_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path("<slug:slug>/", views.group_posts, name="slug"),
+    path("<slug:slug>/", feed_views.group_posts, name="slug"),
 ]
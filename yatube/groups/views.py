@@ -1,17 +1,38 @@
-from django.core.paginator import Paginator
-from django.shortcuts import get_object_or_404, render
+from core.budgets import query_budget
+from django.http import Http404
+from django.shortcuts import render
+from posts.comments import attach_latest_comments
+from posts.conditional import condition_feed, feed_validators, viewer
+from posts.models import Post
+from posts.paginators import KEYS, get_page
 
 from .models import Group
 
 
+def _load_group(request, slug):
+    """Сообщество читает валидатор, представление берёт его из request."""
+    if not hasattr(request, 'group_object'):
+        request.group_object = Group.objects.filter(slug=slug).first()
+    return request.group_object
+
+
+def _group_validators(request, slug):
+    group = _load_group(request, slug)
+    if group is None:
+        return None
+    return feed_validators(Post.objects.filter(group=group), KEYS,
+                           viewer(request))
+
+
+@query_budget(7)
+@condition_feed(_group_validators)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-
-    post_list = group.posts.prefetch_related(
-        'comments', 'author'
-    ).all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = _load_group(request, slug)
+    if group is None:
+        raise Http404
+
+    post_list = group.posts.select_related('author').all()
+    page = get_page(request, post_list)
+    attach_latest_comments(page)
 
     return render(request, "group.html", {"group": group, "page": page})
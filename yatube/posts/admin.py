@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Post
+from . import search
+from .models import Comment, Follow, Post, UserStats
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +10,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо LIKE '%...%' по всей таблице — полнотекстовый индекс
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search.search(search_term)), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("post", "author", "text", "created")
@@ -23,6 +30,12 @@ class FollowAdmin(admin.ModelAdmin):
     list_filter = ("user", "author")
 
 
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ("user", "followers", "follows", "posts")
+    search_fields = ("user__username",)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(UserStats, UserStatsAdmin)
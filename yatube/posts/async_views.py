@@ -0,0 +1,158 @@
+"""
+Async-версии лент и страницы поста для ASGI (yatube/asgi.py).
+ORM синхронный, поэтому запросы идут через sync_to_async,
+а независимые — одновременно через gather().
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from core.budgets import query_budget
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.db import connection
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+from groups.views import _group_validators, _load_group
+
+from . import timeline
+from .caching import feed_version
+from .comments import attach_latest_comments, comment_page
+from .conditional import condition_feed
+from .counters import get_user_stats
+from .forms import CommentForm
+from .models import Post, User
+from .paginators import get_page
+from .views import _index_validators, _load_profile, _profile_validators
+
+arender = sync_to_async(render)
+
+
+def _in_own_connection(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # Поток из пула живёт дольше запроса, а close_old_connections
+        # закрывает только просроченные: соединение закрываем сами
+        connection.close()
+
+
+async def gather(*calls):
+    """
+    Выполняет независимые запросы calls = (func, *args), ...
+    С ASYNC_PARALLEL_QUERIES — одновременно, каждый в своём потоке
+    и со своим соединением, иначе по очереди в одном потоке.
+    """
+    if not settings.ASYNC_PARALLEL_QUERIES:
+        return await sync_to_async(
+            lambda: [func(*args) for func, *args in calls]
+        )()
+    return await asyncio.gather(*(
+        sync_to_async(_in_own_connection, thread_sensitive=False)(*call)
+        for call in calls
+    ))
+
+
+async def _is_authenticated(request):
+    # request.user ленивый и ходит в базу — вычисляем его вне event loop
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def _feed_page(request, post_list, **pagination):
+    page = get_page(request, post_list, **pagination)
+    attach_latest_comments(page)
+    return page
+
+
+@query_budget(6)
+@condition_feed(_index_validators)
+async def index(request):
+    page = await sync_to_async(_feed_page)(
+        request, Post.objects.select_related('author', 'group').all()
+    )
+    return await arender(request, 'index.html', {
+        'page': page, 'feed_etag': request.feed_etag
+    })
+
+
+@query_budget(7)
+@condition_feed(_group_validators)
+async def group_posts(request, slug):
+    group = await sync_to_async(_load_group)(request, slug)
+    if group is None:
+        raise Http404
+    page = await sync_to_async(_feed_page)(
+        request, group.posts.select_related('author').all()
+    )
+    return await arender(request, 'group.html', {'group': group,
+                                                 'page': page})
+
+
+@query_budget(8)
+@condition_feed(_profile_validators)
+async def profile(request, username):
+    # Страница ищет посты по имени автора и не ждёт его самого
+    (author_object, stats, is_subscribed), page = await gather(
+        (_load_profile, request, username),
+        (_feed_page, request, Post.objects.select_related(
+            'author', 'group'
+        ).filter(author__username=username)),
+    )
+    if author_object is None:
+        raise Http404
+    return await arender(request, 'posts/profile.html', {
+        'username': author_object,
+        'page': page,
+        'form': CommentForm(),
+        'is_comment': False,
+        'following': is_subscribed,
+        'stats': stats,
+    })
+
+
+def _get_author(username):
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    return author, get_user_stats(author)
+
+
+def _get_post(username, post_id):
+    return get_object_or_404(Post.objects.select_related('author', 'group'),
+                             author__username=username, id=post_id)
+
+
+@query_budget(5)
+async def post_view(request, username, post_id):
+    await _is_authenticated(request)
+    # Комментарии не зависят от автора: читаем их вместе с постом
+    (author, stats), post_object, comments = await gather(
+        (_get_author, username),
+        (_get_post, username, post_id),
+        (comment_page, Post(pk=post_id), request.GET.get('cursor')),
+    )
+    return await arender(request, 'posts/post.html', {
+        'username': author,
+        'post': post_object,
+        'comments': comments,
+        'form': CommentForm(),
+        'is_comment': True,
+        'stats': stats,
+    })
+
+
+@query_budget(8)
+async def follow_index(request):
+    if not await _is_authenticated(request):
+        return redirect_to_login(request.get_full_path())
+
+    def load():
+        post_list, pagination = timeline.feed(request.user)
+        return _feed_page(request,
+                          post_list.select_related('author', 'group'),
+                          **pagination)
+
+    page, version = await gather((load,), (feed_version,))
+    return await arender(request, 'follow.html', {
+        'page': page,
+        'username': request.user,
+        'feed_version': version,
+    })
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import Counter
+
+from core.budgets import unbudgeted
+from core.metrics import count_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FeedGeneration
+
+FEED_VERSION_KEY = 'posts:feed_version'
+# Единственная строка FeedGeneration
+FEED_GENERATION_ID = 1
+LOCK_PREFIX = 'lock:'
+# События, когда значение пришлось вычислять
+MISS_EVENTS = {'miss', 'revalidate', 'lock_timeout'}
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def _count(event, key):
+    prefix = key.split(':', 1)[0]
+    with _metrics_lock:
+        _metrics[(prefix, event)] += 1
+    count_cache(hit=event not in MISS_EVENTS)
+
+
+def cache_metrics():
+    """
+    Счётчики событий кэша по префиксам ключей в этом процессе:
+    {'index_page': {'hit': 10, 'miss': 1, ...}}.
+    """
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    result = {}
+    for (prefix, event), value in snapshot.items():
+        result.setdefault(prefix, {})[event] = value
+    return result
+
+
+def reset_cache_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def _store(key, value, timeout, stale):
+    fresh_until = time.time() + timeout
+    cache.set(key, (fresh_until, value), timeout + stale)
+    return value
+
+
+def get_or_compute(key, compute, timeout, stale=None):
+    """
+    Достаёт значение из кэша или вычисляет его, причём вычисляет
+    только один процесс (single-flight): остальные ждут результат
+    или, пока он пересчитывается, получают устаревшее значение
+    (stale-while-revalidate). Устаревшее живёт ещё stale секунд.
+    """
+    stale = settings.FEED_CACHE_STALE if stale is None else stale
+    lock_timeout = settings.FEED_CACHE_LOCK_TIMEOUT
+    lock_key = LOCK_PREFIX + key
+
+    cached = cache.get(key)
+    if cached is not None:
+        fresh_until, value = cached
+        if fresh_until > time.time():
+            _count('hit', key)
+            return value
+        if not cache.add(lock_key, 1, lock_timeout):
+            _count('stale', key)
+            return value
+        _count('revalidate', key)
+        try:
+            return _store(key, compute(), timeout, stale)
+        finally:
+            cache.delete(lock_key)
+
+    _count('miss', key)
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            return _store(key, compute(), timeout, stale)
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(settings.FEED_CACHE_POLL_INTERVAL)
+        cached = cache.get(key)
+        if cached is not None:
+            _count('coalesced', key)
+            return cached[1]
+    _count('lock_timeout', key)
+    return _store(key, compute(), timeout, stale)
+
+
+def feed_version():
+    """
+    Номер поколения лент: входит в ключи кэша страниц,
+    поэтому правка любого поста сбрасывает их все разом.
+    """
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, 1, None)
+        version = cache.get(FEED_VERSION_KEY, 1)
+    return version
+
+
+def bump_feed_version():
+    """
+    Сдвигает поколение лент: строку FeedGeneration для валидаторов
+    и номер в кэше для ключей закэшированных страниц.
+    """
+    updated = FeedGeneration.objects.filter(pk=FEED_GENERATION_ID).update(
+        version=F('version') + 1, changed_at=timezone.now()
+    )
+    if not updated:
+        with unbudgeted():
+            FeedGeneration.objects.get_or_create(pk=FEED_GENERATION_ID)
+    try:
+        return cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.add(FEED_VERSION_KEY, 1, None)
+        return feed_version()
+
+
+def bump_card_version(queryset):
+    """
+    Сбрасывает закэшированные карточки постов из queryset.
+    """
+    updated = queryset.update(version=F('version') + 1)
+    if updated:
+        transaction.on_commit(bump_feed_version)
+    return updated
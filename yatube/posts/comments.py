@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db.models import Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment
+from .paginators import CursorPaginator, InvalidCursor
+
+COMMENT_KEYS = ('created', 'id')
+
+
+def comment_page(post, cursor=None):
+    """
+    Страница комментариев поста от новых к старым по курсору.
+    Испорченный или устаревший курсор — первая страница, как в get_page.
+    """
+    comments = post.comments.select_related('author')
+    paginator = CursorPaginator(comments, settings.COMMENTS_PER_PAGE,
+                                COMMENT_KEYS)
+    try:
+        return paginator.page(cursor)
+    except InvalidCursor:
+        return paginator.page()
+
+
+def attach_latest_comments(posts, limit=None):
+    """
+    Кладёт в post.latest_comments последние limit комментариев
+    каждого поста одним запросом, сколько бы их ни было всего.
+    """
+    limit = limit or settings.COMMENTS_PER_CARD
+    posts = list(posts)
+    for post in posts:
+        post.latest_comments = []
+    commented = {post.pk: post for post in posts if post.comment_count}
+    if not commented:
+        return posts
+
+    condition = Q()
+    for post_id in commented:
+        nth_newest = Comment.objects.filter(post_id=post_id).order_by(
+            '-id'
+        ).values('id')[limit - 1:limit]
+        condition |= Q(post_id=post_id,
+                       id__gte=Coalesce(Subquery(nth_newest), 0))
+    latest = Comment.objects.filter(condition).select_related(
+        'author'
+    ).order_by('-created', '-id')
+    for comment in latest:
+        commented[comment.post_id].latest_comments.append(comment)
+    return posts
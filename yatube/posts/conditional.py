@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Subquery
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from .caching import FEED_GENERATION_ID
+from .models import FeedGeneration
+from .paginators import KEYS, ordering
+
+
+def feed_validators(queryset, keys=KEYS, *parts):
+    """
+    Валидаторы ленты одним запросом, не читая строк постов: поколение
+    лент из FeedGeneration (правки, удаления, комментарии, миниатюры)
+    и дата самой новой записи из индекса ленты (новые посты). Оба
+    значения лежат в базе, поэтому все процессы считают ETag одинаково.
+    Last-Modified — позднейшее из этой даты и смены поколения.
+    parts — всё, от чего ещё зависит лента, например её владелец.
+    Возвращает (etag, last_modified).
+    """
+    newest = queryset.order_by(*ordering(keys)).values(keys[0])[:1]
+    state = FeedGeneration.objects.filter(pk=FEED_GENERATION_ID).annotate(
+        newest=Subquery(newest)
+    ).values_list('version', 'changed_at', 'newest').first()
+    if state is None:
+        # Строку создаст первый bump_feed_version, здесь только чтение
+        state = (0, None, newest.values_list(keys[0], flat=True).first())
+    version, changed_at, newest = state
+    key = ':'.join(str(part) for part in (
+        version, newest.timestamp() if newest else 0, *parts
+    ))
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    dates = [date for date in (changed_at, newest) if date is not None]
+    last_modified = int(max(dates).timestamp()) if dates else None
+    return etag, last_modified
+
+
+def _set_validators(response, validators):
+    etag, last_modified = validators
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_response(request, validators, render):
+    """
+    Отвечает 304, если у клиента актуальная версия, иначе вызывает
+    render(). В обоих случаях проставляет валидаторы в заголовки.
+    """
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is None:
+        response = render()
+    return _set_validators(response, validators)
+
+
+def viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anon'
+
+
+def _patch_feed_headers(request, response):
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0,
+                            s_maxage=settings.FEED_PROXY_MAX_AGE)
+    return response
+
+
+def condition_feed(validators_func):
+    """
+    Декоратор HTML-ленты: до запросов самой страницы считает
+    validators_func(request, *args, **kwargs) и отвечает 304, если можно.
+    None вместо валидаторов — отдать страницу как есть (например, 404).
+    ETag остаётся в request.feed_etag: по нему представление кэширует
+    фрагмент, чтобы страница из кэша всегда совпадала с валидатором.
+    Анонимную ленту разрешает хранить прокси, личную — только браузеру.
+    Работает и с async-представлениями.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                validators = await sync_to_async(validators_func)(
+                    request, *args, **kwargs
+                )
+                if validators is None:
+                    return await view(request, *args, **kwargs)
+                etag, last_modified = validators
+                request.feed_etag = etag
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                )
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                _set_validators(response, validators)
+                return _patch_feed_headers(request, response)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            validators = validators_func(request, *args, **kwargs)
+            if validators is None:
+                return view(request, *args, **kwargs)
+            request.feed_etag = validators[0]
+            response = conditional_response(
+                request, validators, lambda: view(request, *args, **kwargs)
+            )
+            return _patch_feed_headers(request, response)
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+from core.budgets import unbudgeted
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+STATS_FIELDS = ('followers', 'follows', 'posts')
+
+
+def _count_subquery(queryset, field):
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+        field
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def actual_comment_count():
+    return _count_subquery(Comment.objects.all(), 'post')
+
+
+def rebuild_comment_counts(queryset=None):
+    """
+    Пересчитывает comment_count одним UPDATE по всем постам.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(comment_count=actual_comment_count())
+
+
+def reconcile_comment_counts(queryset=None, batch_size=1000, fix=True):
+    """
+    Находит посты с разошедшимся счётчиком и исправляет только их.
+    Возвращает список (id, было, стало).
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    drifted = queryset.annotate(actual=actual_comment_count()).exclude(
+        comment_count=F('actual')
+    ).only('id', 'comment_count')
+    mismatches = []
+    batch = []
+    for post in drifted.iterator(chunk_size=batch_size):
+        mismatches.append((post.pk, post.comment_count, post.actual))
+        if not fix:
+            continue
+        post.comment_count = post.actual
+        batch.append(post)
+        if len(batch) >= batch_size:
+            Post.objects.bulk_update(batch, ['comment_count'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['comment_count'])
+    return mismatches
+
+
+def actual_user_stats():
+    return {
+        'actual_followers': _count_subquery(Follow.objects.all(), 'author'),
+        'actual_follows': _count_subquery(Follow.objects.all(), 'user'),
+        'actual_posts': _count_subquery(Post.objects.all(), 'author'),
+    }
+
+
+def rebuild_user_stats(user_id):
+    # Запись создаётся один раз на пользователя — не в счёт бюджета
+    with unbudgeted():
+        stats, _ = UserStats.objects.update_or_create(
+            user_id=user_id, defaults={
+                'followers': Follow.objects.filter(author_id=user_id).count(),
+                'follows': Follow.objects.filter(user_id=user_id).count(),
+                'posts': Post.objects.filter(author_id=user_id).count(),
+            }
+        )
+    return stats
+
+
+def bump_user_stats(user_id, **deltas):
+    """
+    Атомарно сдвигает счётчики пользователя, например posts=1.
+    Вызывать в той же транзакции, что и саму запись.
+    """
+    updated = UserStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated:
+        rebuild_user_stats(user_id)
+
+
+def drop_user_stats(user_id, **deltas):
+    """
+    Уменьшает счётчики после удаления, например posts=1. Запись не
+    создаёт: пользователь может удаляться сам, а недостающую соберёт
+    get_user_stats. Ниже нуля не опускает.
+    """
+    UserStats.objects.filter(user_id=user_id, **{
+        f'{field}__gte': delta for field, delta in deltas.items()
+    }).update(**{
+        field: F(field) - delta for field, delta in deltas.items()
+    })
+
+
+def get_user_stats(user):
+    """
+    Счётчики пользователя, загруженного через select_related('stats').
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return rebuild_user_stats(user.pk)
+
+
+def reconcile_user_stats(batch_size=1000, fix=True):
+    """
+    Создаёт недостающие и исправляет разошедшиеся записи UserStats.
+    Возвращает список (id пользователя, было, стало).
+    """
+    users = User.objects.annotate(**actual_user_stats()).values_list(
+        'pk', 'stats__followers', 'stats__follows', 'stats__posts',
+        'actual_followers', 'actual_follows', 'actual_posts'
+    ).order_by('pk')
+    mismatches = []
+    to_create = []
+    to_update = []
+    for pk, *values in users.iterator(chunk_size=batch_size):
+        stored, actual = tuple(values[:3]), tuple(values[3:])
+        if stored == actual:
+            continue
+        mismatches.append((pk, stored, actual))
+        if not fix:
+            continue
+        stats = UserStats(pk, *actual)
+        if stored[0] is None:
+            to_create.append(stats)
+        else:
+            to_update.append(stats)
+        if len(to_create) >= batch_size:
+            UserStats.objects.bulk_create(to_create)
+            to_create = []
+        if len(to_update) >= batch_size:
+            UserStats.objects.bulk_update(to_update, STATS_FIELDS)
+            to_update = []
+    UserStats.objects.bulk_create(to_create)
+    if to_update:
+        UserStats.objects.bulk_update(to_update, STATS_FIELDS)
+    return mismatches
@@ -1,9 +1,35 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
+from PIL import Image
 
+from .images import reencode_image
 from .models import Comment, Post
 
 
+def _pixels(image_file):
+    """
+    Число пикселей по заголовку: Image.open не декодирует картинку.
+    Не картинка — 0, её отклонит ImageField.
+    """
+    try:
+        with Image.open(image_file) as image:
+            width, height = image.size
+    except Exception:
+        return 0
+    finally:
+        image_file.seek(0)
+    return width * height
+
+
 class PostForm(ModelForm):
+    """
+    Картинку отсекает по размеру файла до Pillow, по размерам
+    из заголовка до verify() в ImageField и один раз перекодирует
+    без EXIF.
+    """
+
     class Meta:
         model = Post
         fields = ['text', 'group', 'image']
@@ -13,6 +39,36 @@ class PostForm(ModelForm):
             'image': 'Изображение'
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        image = self.files.get('image')
+        # Слишком большой файл (в том числе обрезанный LimitedUploadHandler)
+        # и картинку сверх лимита пикселей не отдаём ImageField,
+        # чтобы Pillow их даже не проверял
+        self.image_error = None
+        if image and image.size > settings.POST_IMAGE_MAX_BYTES:
+            self.image_error = ValidationError(
+                'Файл больше %(limit)s МБ.', code='too_large',
+                params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20}
+            )
+        elif image and _pixels(image) > settings.POST_IMAGE_MAX_PIXELS:
+            self.image_error = ValidationError(
+                'Картинка больше %(limit)s мегапикселей.',
+                code='too_many_pixels',
+                params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6}
+            )
+        if self.image_error:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.image_error:
+            raise self.image_error
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        return reencode_image(image)
+
 
 class CommentForm(ModelForm):
     class Meta:
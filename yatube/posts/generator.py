@@ -0,0 +1,202 @@
+"""
+Генератор правдоподобных данных для нагрузочных замеров:
+популярность авторов, постов и сообществ распределена по Ципфу,
+всё вставляется пачками через bulk_create.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from groups.models import Group
+
+from . import hot, search, timeline
+from .caching import bump_feed_version
+from .counters import rebuild_comment_counts, reconcile_user_stats
+from .models import Comment, Follow, Post
+
+User = get_user_model()
+
+WORDS = (
+    'сегодня вчера город кот собака погода море горы книга фильм музыка '
+    'работа отпуск поезд самолёт кофе чай дождь солнце зима лето весна '
+    'осень друзья семья проект код релиз баг тест идея вопрос ответ '
+    'новости история фото прогулка парк река лес ужин завтрак концерт'
+).split()
+
+
+def zipf_cum_weights(count, skew):
+    """
+    Накопленные веса для random.choices: элемент ранга r выпадает
+    с вероятностью ~ 1 / r ** skew.
+    """
+    return list(itertools.accumulate(
+        1 / rank ** skew for rank in range(1, count + 1)
+    ))
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """
+    Временно отключает auto_now_add, чтобы bulk_create сохранил
+    заданные даты, а не «сейчас» у всех записей.
+    """
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class DataGenerator:
+    def __init__(self, seed=None, skew=1.1, batch_size=5000, days=365,
+                 prefix='gen', log=None):
+        self.random = random.Random(seed)
+        self.skew = skew
+        self.batch_size = batch_size
+        self.days = days
+        self.prefix = prefix
+        self.log = log or (lambda message: None)
+
+    def _batches(self, objects):
+        iterator = iter(objects)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _text(self, low, high):
+        words = self.random.choices(WORDS, k=self.random.randint(low, high))
+        return ' '.join(words).capitalize() + '.'
+
+    def _dates(self, count):
+        """Даты по возрастанию за последние days дней."""
+        now = timezone.now()
+        span = timedelta(days=self.days).total_seconds()
+        step = span / max(count, 1)
+        for i in range(count):
+            offset = span - step * i - self.random.random() * step
+            yield now - timedelta(seconds=offset)
+
+    def _skewed(self, population, k):
+        """k элементов population, первые выпадают чаще (Ципф)."""
+        cum_weights = zipf_cum_weights(len(population), self.skew)
+        return self.random.choices(population, cum_weights=cum_weights, k=k)
+
+    def users(self, count):
+        start = User.objects.filter(
+            username__startswith=self.prefix
+        ).count()
+        names = [f'{self.prefix}{start + i}' for i in range(count)]
+        for batch in self._batches(names):
+            User.objects.bulk_create(
+                User(username=name, password='!') for name in batch
+            )
+        self.log(f'пользователей: {count}')
+        return list(User.objects.filter(username__in=names).order_by(
+            'pk'
+        ).values_list('pk', flat=True)) if count else []
+
+    def groups(self, count):
+        start = Group.objects.filter(slug__startswith=self.prefix).count()
+        slugs = [f'{self.prefix}-{start + i}' for i in range(count)]
+        Group.objects.bulk_create(
+            (Group(title=f'Сообщество {slug}', slug=slug,
+                   description=self._text(5, 20)) for slug in slugs),
+            batch_size=self.batch_size
+        )
+        self.log(f'сообществ: {count}')
+        return list(Group.objects.filter(slug__in=slugs).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+
+    def posts(self, count, author_ids, group_ids):
+        authors = self._skewed(author_ids, count)
+        groups = (self._skewed(group_ids, count) if group_ids
+                  else [None] * count)
+        rows = (
+            Post(text=self._text(5, 60), author_id=author, pub_date=date,
+                 group_id=group if self.random.random() < 0.5 else None)
+            for author, group, date in zip(authors, groups,
+                                           self._dates(count))
+        )
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            for batch in self._batches(rows):
+                Post.objects.bulk_create(batch)
+        self.log(f'постов: {count}')
+
+    def comments(self, count, author_ids):
+        post_ids = list(Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ))
+        if not post_ids:
+            return
+        # Популярные посты — случайные, а не только самые новые
+        self.random.shuffle(post_ids)
+        rows = (
+            Comment(post_id=post, author_id=author, created=date,
+                    text=self._text(2, 20))
+            for post, author, date in zip(
+                self._skewed(post_ids, count),
+                self.random.choices(author_ids, k=count),
+                self._dates(count),
+            )
+        )
+        with explicit_dates(Comment._meta.get_field('created')):
+            for batch in self._batches(rows):
+                Comment.objects.bulk_create(batch)
+        self.log(f'комментариев: {count}')
+
+    def follows(self, count, user_ids):
+        count = min(count, len(user_ids) * (len(user_ids) - 1))
+        pairs = set()
+        while len(pairs) < count:
+            needed = count - len(pairs)
+            for user, author in zip(self.random.choices(user_ids, k=needed),
+                                    self._skewed(user_ids, needed)):
+                if user != author:
+                    pairs.add((user, author))
+        for batch in self._batches(pairs):
+            Follow.objects.bulk_create(
+                (Follow(user_id=user, author_id=author)
+                 for user, author in batch),
+                ignore_conflicts=True
+            )
+        self.log(f'подписок: {count}')
+
+    def generate(self, users=0, groups=0, posts=0, comments=0, follows=0):
+        """
+        Создаёт данные и пересчитывает всё денормализованное:
+        счётчики комментариев, UserStats, поисковый индекс
+        и материализованные ленты (если FEED_FANOUT включён).
+        """
+        user_ids = self.users(users) or list(
+            User.objects.values_list('pk', flat=True)
+        )
+        group_ids = self.groups(groups) or list(
+            Group.objects.values_list('pk', flat=True)
+        )
+        if not user_ids:
+            return
+        self.posts(posts, user_ids, group_ids)
+        if comments:
+            self.comments(comments, user_ids)
+        if follows:
+            self.follows(follows, user_ids)
+        rebuild_comment_counts()
+        reconcile_user_stats(batch_size=self.batch_size)
+        search.rebuild(batch_size=self.batch_size)
+        hot.rebuild(batch_size=self.batch_size)
+        if timeline.is_enabled():
+            for user_id in Follow.objects.values_list(
+                'user_id', flat=True
+            ).distinct().order_by('user_id'):
+                timeline.rebuild(user_id)
+        bump_feed_version()
+        self.log('счётчики, поисковый индекс, оценки популярности и ленты '
+                 'пересчитаны')
@@ -0,0 +1,127 @@
+"""
+Популярные посты. Оценка поста —
+log2(1 + комментарии·HOT_COMMENT_WEIGHT + подписчики автора·
+HOT_FOLLOWER_WEIGHT) + время публикации / HOT_HALF_LIFE.
+Затухание зашито во второе слагаемое: пост на HOT_HALF_LIFE новее
+равен вдвое более обсуждаемому, поэтому хранимую Post.hot_score
+не нужно пересчитывать со временем — только когда меняется вес.
+Комментарий или подписчик сдвигают её одним UPDATE на разность
+логарифмов, а вкладка берёт верх индекса post_hot_idx.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import (ExpressionWrapper, F, FloatField, OuterRef,
+                              Subquery, Value)
+from django.db.models.functions import Coalesce, Ln
+from django.utils import timezone
+
+from .caching import get_or_compute
+from .models import Post, UserStats
+
+HOT_KEY = 'posts:hot'
+LN2 = math.log(2)
+
+
+def weight(comments, followers):
+    return (1 + comments * settings.HOT_COMMENT_WEIGHT
+            + followers * settings.HOT_FOLLOWER_WEIGHT)
+
+
+def score(comments, followers, pub_date):
+    return (math.log2(weight(comments, followers))
+            + pub_date.timestamp() / settings.HOT_HALF_LIFE)
+
+
+def _log_weight(comments, followers):
+    return ExpressionWrapper(
+        Ln(Value(1.0) + comments * settings.HOT_COMMENT_WEIGHT
+           + followers * settings.HOT_FOLLOWER_WEIGHT) / LN2,
+        output_field=FloatField()
+    )
+
+
+def _followers():
+    return Coalesce(Subquery(UserStats.objects.filter(
+        user=OuterRef('author')
+    ).values('followers')[:1]), 0)
+
+
+def window_start():
+    return timezone.now() - timedelta(seconds=settings.HOT_WINDOW)
+
+
+def initial_score(author_id, pub_date=None):
+    """
+    Оценка нового поста без комментариев. Без pub_date пост
+    публикуется сейчас.
+    """
+    followers = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers', flat=True
+    ).first() or 0
+    return score(0, followers, pub_date or timezone.now())
+
+
+def comments_changed(delta):
+    """
+    Выражение для update() вместе с comment_count=F(...) + delta:
+    в UPDATE справа стоят старые значения полей.
+    """
+    followers = _followers()
+    return (F('hot_score')
+            + _log_weight(F('comment_count') + delta, followers)
+            - _log_weight(F('comment_count'), followers))
+
+
+def followers_changed(author_id, delta):
+    """
+    Сдвигает оценки постов автора из окна HOT_WINDOW после того,
+    как его UserStats.followers изменился на delta. Посты старше
+    окна на вкладку не попадают, их оценку поправит rebuild.
+    """
+    followers = _followers()
+    return Post.objects.filter(
+        author_id=author_id, pub_date__gte=window_start()
+    ).update(hot_score=F('hot_score')
+             + _log_weight(F('comment_count'), followers)
+             - _log_weight(F('comment_count'), followers - delta))
+
+
+def rebuild(queryset=None, batch_size=1000):
+    """
+    Пересчитывает оценки с нуля, по умолчанию для постов из окна.
+    Возвращает число постов.
+    """
+    if queryset is None:
+        queryset = Post.objects.filter(pub_date__gte=window_start())
+    posts = queryset.annotate(followers=_followers()).only(
+        'id', 'comment_count', 'pub_date', 'hot_score'
+    )
+    total = 0
+    batch = []
+    for post in posts.iterator(chunk_size=batch_size):
+        post.hot_score = score(post.comment_count, post.followers,
+                               post.pub_date)
+        batch.append(post)
+        total += 1
+        if len(batch) >= batch_size:
+            Post.objects.bulk_update(batch, ['hot_score'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['hot_score'])
+    return total
+
+
+def top_ids():
+    """
+    id HOT_SIZE лучших постов окна. Список держится в кэше
+    HOT_CACHE_SECONDS, так что страница вкладки — один in_bulk.
+    """
+    def compute():
+        return list(Post.objects.filter(
+            pub_date__gte=window_start()
+        ).order_by('-hot_score', '-id').values_list(
+            'pk', flat=True
+        )[:settings.HOT_SIZE])
+    return get_or_compute(HOT_KEY, compute, settings.HOT_CACHE_SECONDS)
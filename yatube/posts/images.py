@@ -0,0 +1,93 @@
+from io import BytesIO
+
+from core.tasks import task
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from .caching import bump_feed_version
+from .models import Post
+
+# Форматы, где несколько кадров — анимация. У MPO кадры — это снимки
+# одной сцены (стерепара, превью), в ленте нужен только первый
+ANIMATED_FORMATS = ('GIF', 'WEBP', 'PNG')
+
+
+def reencode_image(image_file):
+    """
+    Один раз перекодирует проверенную картинку в её же формат:
+    поворачивает по EXIF и отбрасывает метаданные. Анимацию (GIF,
+    WebP, APNG) сохраняет всеми кадрами и без поворота: exif_transpose
+    вернул бы один первый кадр. MPO с камер сохраняет первым кадром
+    как обычный JPEG.
+    """
+    image_file.seek(0)
+    buffer = BytesIO()
+    with Image.open(image_file) as image:
+        format_ = 'JPEG' if image.format == 'MPO' else image.format
+        if (format_ in ANIMATED_FORMATS
+                and getattr(image, 'is_animated', False)):
+            image.save(buffer, format=format_, save_all=True,
+                       quality=settings.POST_IMAGE_QUALITY)
+        else:
+            image = ImageOps.exif_transpose(image)
+            if format_ == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(buffer, format=format_,
+                       quality=settings.POST_IMAGE_QUALITY)
+    return SimpleUploadedFile(image_file.name, buffer.getvalue(),
+                              Image.MIME.get(format_,
+                                             image_file.content_type))
+
+
+def _geometry(width):
+    geometry, _ = settings.POST_THUMBNAIL
+    full_width, full_height = map(int, geometry.split('x'))
+    return f'{width}x{round(width * full_height / full_width)}'
+
+
+def make_variants(image_name):
+    """
+    Режет картинку во всех ширинах POST_IMAGE_WIDTHS и форматах
+    POST_IMAGE_FORMATS. Возвращает манифест {формат: [[ширина, имя], ...]}.
+    """
+    _, options = settings.POST_THUMBNAIL
+    return {
+        format_: [
+            [width, get_thumbnail(image_name, _geometry(width),
+                                  format=format_,
+                                  quality=settings.POST_IMAGE_QUALITY,
+                                  **options).name]
+            for width in sorted(settings.POST_IMAGE_WIDTHS)
+        ]
+        for format_ in settings.POST_IMAGE_FORMATS
+    }
+
+
+@task()
+def make_thumbnail(post_id, image_name):
+    """
+    Режет варианты миниатюры и записывает их манифест в пост,
+    если картинка за это время не сменилась. Самый широкий вариант
+    запасного формата становится Post.thumbnail.
+    """
+    variants = make_variants(image_name)
+    _, thumbnail = variants[settings.POST_IMAGE_FORMATS[-1]][-1]
+    updated = Post.objects.filter(pk=post_id, image=image_name).update(
+        thumbnail=thumbnail, image_variants=variants,
+        version=F('version') + 1
+    )
+    if updated:
+        bump_feed_version()
+    return thumbnail
+
+
+def schedule_thumbnail(post):
+    """
+    Ставит нарезку миниатюры в очередь фоновых задач,
+    чтобы запрос не ждал Pillow.
+    """
+    if post.image:
+        make_thumbnail.delay(post.pk, post.image.name)
@@ -0,0 +1,55 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+def _fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (URLError, OSError):
+        ok = False
+    return ok, (time.perf_counter() - started) * 1000
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест уже запущенного сервера: держит --concurrency '
+            'одновременных запросов к страницам и печатает RPS и задержки. '
+            'Так сравниваются развёртывания через wsgi.py и asgi.py.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_url', help='Например, http://127.0.0.1:8000')
+        parser.add_argument('--paths', default='/,/PavelZ/',
+                            help='Пути страниц через запятую.')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Запросов на каждый путь.')
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        self.stdout.write(f'{"path":<24} {"rps":>8} {"p50, ms":>9} '
+                          f'{"p95, ms":>9} {"errors":>7}')
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            for path in options['paths'].split(','):
+                url = base_url + path
+                started = time.perf_counter()
+                results = list(executor.map(
+                    lambda _: _fetch(url, options['timeout']),
+                    range(options['requests'])
+                ))
+                elapsed = time.perf_counter() - started
+                timings = sorted(ms for _, ms in results)
+                errors = sum(1 for ok, _ in results if not ok)
+                p95 = timings[int(len(timings) * 0.95) - 1]
+                self.stdout.write(
+                    f'{path:<24} {len(results) / elapsed:>8.1f} '
+                    f'{statistics.median(timings):>9.1f} {p95:>9.1f} '
+                    f'{errors:>7}'
+                )
@@ -0,0 +1,69 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.models import Post
+from posts.paginators import CursorPaginator, encode_cursor
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время открытия последней страницы ленты '
+            'через OFFSET и через курсор при разном объёме таблицы. '
+            'Все созданные записи откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Размеры таблицы постов через запятую.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        per_page = settings.POSTS_PER_PAGES
+        self.stdout.write(f'{"posts":>10} {"offset, ms":>12} '
+                          f'{"cursor, ms":>12}')
+        with transaction.atomic():
+            author = User.objects.create(username='bench_pagination')
+            created = 0
+            for size in sizes:
+                created += self._fill(author, size - created,
+                                      options['batch'])
+                post_list = Post.objects.filter(author=author)
+                offset_ms = self._measure(
+                    lambda: list(post_list.order_by('-pub_date', '-id')[
+                        size - per_page:size
+                    ]),
+                    options['repeat']
+                )
+                anchor = post_list.order_by('-pub_date', '-id')[
+                    size - per_page - 1
+                ]
+                cursor = encode_cursor(anchor)
+                cursor_ms = self._measure(
+                    lambda: CursorPaginator(post_list, per_page).page(cursor),
+                    options['repeat']
+                )
+                self.stdout.write(f'{size:>10} {offset_ms:>12.2f} '
+                                  f'{cursor_ms:>12.2f}')
+            transaction.set_rollback(True)
+
+    def _fill(self, author, count, batch):
+        for start in range(0, count, batch):
+            Post.objects.bulk_create(
+                Post(text=f'bench {start + i}', author=author)
+                for i in range(min(batch, count - start))
+            )
+        return max(count, 0)
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
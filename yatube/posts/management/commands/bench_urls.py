@@ -0,0 +1,122 @@
+import statistics
+import time
+
+from core.budgets import get_budget
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from groups import urls as group_urls
+from groups.models import Group
+from posts import urls as post_urls
+from posts.generator import DataGenerator
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+PREFIX = 'bench'
+# Параметры, без которых страница пустая
+QUERY_STRINGS = {'search': '?q=город'}
+# Страницы, которые открывает только автор поста
+AUTHOR_VIEWS = {'post_edit'}
+
+
+def url_patterns():
+    for pattern in post_urls.urlpatterns + group_urls.urlpatterns:
+        # include() (about) — не страницы постов
+        if isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95 и число запросов для каждого адреса '
+            'posts/urls.py и groups/urls.py на данных разного объёма. '
+            'Сгенерированные данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Число постов через запятую.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warm', action='store_true',
+                            help='Не сбрасывать кеш перед запросами.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        generator = DataGenerator(seed=options['seed'],
+                                  batch_size=options['batch'],
+                                  prefix=PREFIX)
+        with transaction.atomic():
+            created = 0
+            for size in sizes:
+                count = size - created
+                # 20 постов на автора, 2 комментария на пост,
+                # 10 подписок на пользователя
+                users = max(count // 20, 2)
+                generator.generate(
+                    users=users, groups=max(count // 1000, 1),
+                    posts=count, comments=count * 2, follows=users * 10,
+                )
+                created = size
+                self.stdout.write(f'\nПостов: {size}')
+                self._bench(options['repeat'], options['warm'])
+            transaction.set_rollback(True)
+        cache.clear()
+
+    def _targets(self):
+        """
+        Самый популярный автор (первый по Ципфу), его последний пост,
+        первое сообщество и один из подписчиков автора.
+        """
+        author = User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('pk').first()
+        post_id = Post.objects.filter(author=author).latest('pk').pk
+        slug = Group.objects.filter(slug__startswith=PREFIX).order_by(
+            'pk'
+        ).values_list('slug', flat=True).first()
+        reader = User.objects.filter(
+            pk__in=Follow.objects.filter(author=author).values('user')
+        ).first() or User.objects.exclude(pk=author.pk).first()
+        return {'username': author.username, 'post_id': post_id,
+                'slug': slug}, author, reader
+
+    def _bench(self, repeat, warm):
+        kwargs, author, reader = self._targets()
+        clients = {}
+        for user in (author, reader):
+            # Не локальный адрес клиента — иначе при DEBUG включится
+            # debug toolbar; хост — из ALLOWED_HOSTS, а не testserver
+            clients[user] = Client(REMOTE_ADDR='10.0.0.1',
+                                   SERVER_NAME=settings.ALLOWED_HOSTS[-1])
+            clients[user].force_login(user)
+        self.stdout.write(f'{"url":<18} {"p50, ms":>9} {"p95, ms":>9} '
+                          f'{"queries":>8} {"budget":>7} {"status":>7}')
+        for pattern in url_patterns():
+            url = reverse(pattern.name, kwargs={
+                key: kwargs[key] for key in pattern.pattern.converters
+            }) + QUERY_STRINGS.get(pattern.name, '')
+            client = clients[author if pattern.name in AUTHOR_VIEWS
+                             else reader]
+            timings, queries = [], []
+            for _ in range(repeat):
+                if not warm:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(context))
+            p95 = (statistics.quantiles(timings, n=20)[-1]
+                   if repeat > 1 else timings[0])
+            self.stdout.write(
+                f'{pattern.name:<18} {statistics.median(timings):>9.2f} '
+                f'{p95:>9.2f} {statistics.median(queries):>8g} '
+                f'{get_budget(pattern.callback) or "-":>7} '
+                f'{response.status_code:>7}'
+            )
@@ -0,0 +1,91 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.writebehind import run_write
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import override_settings
+from posts import writes
+from posts.models import Follow, Post, User
+
+PREFIX = 'bench-writes'
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест мелких записей: --threads потоков '
+            'в течение --seconds пишут комментарии и подписки сначала '
+            'по одной транзакции на запись, потом пачками через '
+            'core.writebehind, и печатают записей в секунду.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        author = User.objects.create(username=f'{PREFIX}-author')
+        post = Post.objects.create(text='Пост для записей', author=author)
+        users = [User(username=f'{PREFIX}-{i}')
+                 for i in range(options['threads'])]
+        User.objects.bulk_create(users)
+        users = list(User.objects.filter(username__startswith=f'{PREFIX}-')
+                     .exclude(pk=author.pk).values_list('pk', flat=True))
+        self.stdout.write(f'{"mode":<10} {"writes/s":>9} {"p50, ms":>9} '
+                          f'{"p95, ms":>9} {"errors":>7}')
+        try:
+            for batching in (False, True):
+                with override_settings(WRITE_BATCHING=batching):
+                    self._run('batched' if batching else 'direct',
+                              users, author.pk, post.pk, options['seconds'])
+        finally:
+            bench_users = User.objects.filter(
+                username__startswith=f'{PREFIX}-'
+            )
+            # У подписок DO_NOTHING, остальное удалится каскадом
+            Follow.objects.filter(user__in=bench_users).delete()
+            bench_users.delete()
+
+    def _run(self, mode, users, author_id, post_id, seconds):
+        deadline = time.monotonic() + seconds
+        lock = threading.Lock()
+        timings = []
+        errors = 0
+
+        def worker(user_id):
+            nonlocal errors
+            following = False
+            try:
+                while time.monotonic() < deadline:
+                    # Комментарий и подписка/отписка через раз
+                    if len(timings) % 2:
+                        func, args = writes.add_comment, (
+                            post_id, user_id, 'Комментарий')
+                    else:
+                        func = writes.unfollow if following else writes.follow
+                        args = (user_id, author_id)
+                    started = time.perf_counter()
+                    try:
+                        run_write(func, *args)
+                    except OperationalError:
+                        with lock:
+                            errors += 1
+                        continue
+                    if func is not writes.add_comment:
+                        following = not following
+                    with lock:
+                        timings.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(len(users)) as executor:
+            list(executor.map(worker, users))
+        elapsed = time.monotonic() - started
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if timings else 0
+        self.stdout.write(
+            f'{mode:<10} {len(timings) / elapsed:>9.1f} '
+            f'{statistics.median(timings) if timings else 0:>9.1f} '
+            f'{p95:>9.1f} {errors:>7}'
+        )
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.generator import DataGenerator
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу правдоподобными данными пачками bulk_create: '
+            'популярность авторов распределена по Ципфу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument('--follows', type=int, default=20000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель Ципфа: чем больше, тем сильнее '
+                                 'перекос популярности.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разбросать даты.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--batch', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        generator = DataGenerator(
+            seed=options['seed'], skew=options['skew'],
+            batch_size=options['batch'], days=options['days'],
+            log=lambda message: self.stdout.write(
+                f'{time.perf_counter() - started:8.2f} с  {message}'
+            )
+        )
+        with transaction.atomic():
+            generator.generate(
+                users=options['users'], groups=options['groups'],
+                posts=options['posts'], comments=options['comments'],
+                follows=options['follows'],
+            )
+        self.stdout.write(f'Готово за {time.perf_counter() - started:.2f} с')
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts import hot
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает Post.hot_score с нуля. По умолчанию только '
+            'посты из окна HOT_WINDOW — остальные на вкладку не попадают.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересчитать все посты.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        queryset = Post.objects.all() if options['all'] else None
+        total = hot.rebuild(queryset, batch_size=options['batch_size'])
+        self.stdout.write(f'Пересчитано постов: {total} '
+                          f'за {time.perf_counter() - started:.2f} с')
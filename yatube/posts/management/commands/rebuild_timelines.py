@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from posts import timeline
+from posts.models import Follow
+
+
+class Command(BaseCommand):
+    help = ('Заново заполняет материализованные ленты подписок '
+            '(нужно после включения FEED_FANOUT). С --trim только '
+            'обрезает их до FEED_INBOX_SIZE: лишнее во входящих '
+            'убирает чтение ленты, а тех, кто её не читает, — эта '
+            'команда по расписанию.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            help='id пользователя, можно несколько раз.')
+        parser.add_argument('--trim', action='store_true',
+                            help='Только обрезать входящие.')
+
+    def handle(self, *args, **options):
+        if not timeline.is_enabled():
+            raise CommandError('FEED_FANOUT выключен в настройках.')
+        started = time.perf_counter()
+        user_ids = options['user'] or Follow.objects.values_list(
+            'user_id', flat=True
+        ).distinct().order_by('user_id')
+        action = timeline.trim if options['trim'] else timeline.rebuild
+        total = 0
+        for user_id in user_ids:
+            action(user_id)
+            total += 1
+        done = 'Обрезано' if options['trim'] else 'Перестроено'
+        self.stdout.write(f'{done} лент: {total} '
+                          f'за {time.perf_counter() - started:.2f} с')
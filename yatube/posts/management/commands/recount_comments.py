@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts.counters import rebuild_comment_counts, reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = ('Сверяет Post.comment_count с реальным числом комментариев. '
+            'По умолчанию исправляет только разошедшиеся посты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Пересчитать все посты одним UPDATE.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать расхождения.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['rebuild']:
+            updated = rebuild_comment_counts()
+            self.stdout.write(f'Пересчитано постов: {updated} '
+                              f'за {time.perf_counter() - started:.2f} с')
+            return
+
+        mismatches = reconcile_comment_counts(
+            batch_size=options['batch_size'], fix=not options['dry_run']
+        )
+        for post_id, stored, actual in mismatches[:20]:
+            self.stdout.write(f'post {post_id}: {stored} -> {actual}')
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(f'{action} расхождений: {len(mismatches)} '
+                          f'за {time.perf_counter() - started:.2f} с')
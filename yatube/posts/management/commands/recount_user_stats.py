@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from posts.counters import reconcile_user_stats
+
+
+class Command(BaseCommand):
+    help = ('Сверяет UserStats (подписчики, подписки, записи) '
+            'с реальными данными и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать расхождения.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        mismatches = reconcile_user_stats(
+            batch_size=options['batch_size'], fix=not options['dry_run']
+        )
+        for user_id, stored, actual in mismatches[:20]:
+            self.stdout.write(f'user {user_id}: {stored} -> {actual}')
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(f'{action} расхождений: {len(mismatches)} '
+                          f'за {time.perf_counter() - started:.2f} с')
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from posts.images import make_thumbnail
+from posts.models import Post
+
+
+def _warm(post_id, image_name):
+    try:
+        return make_thumbnail(post_id, image_name)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Заранее нарезает миниатюры картинок постов и их варианты '
+            'для srcset в несколько потоков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='1 — резать в текущем потоке.')
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать и уже готовые миниатюры.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(Q(thumbnail='') | Q(image_variants={}))
+        jobs = list(posts.values_list('pk', 'image'))
+        started = time.perf_counter()
+        done = failed = 0
+        for post_id, error in self._run(jobs, options['workers']):
+            if error is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f'post {post_id}: {error}')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Готово: {done}, ошибок: {failed} '
+                          f'за {elapsed:.2f} с')
+
+    def _run(self, jobs, workers):
+        if workers <= 1:
+            for pk, image in jobs:
+                try:
+                    make_thumbnail(pk, image)
+                    yield pk, None
+                except Exception as error:
+                    yield pk, error
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_warm, pk, image): pk
+                       for pk, image in jobs}
+            for future in as_completed(futures):
+                yield futures[future], future.exception()
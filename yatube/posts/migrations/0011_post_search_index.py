@@ -0,0 +1,57 @@
+import re
+
+import snowballstemmer
+from django.db import migrations
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def stem_words(stemmer, text):
+    # Копия posts.search.stem_words на момент миграции: историческая
+    # миграция не должна меняться вместе с кодом приложения
+    words = re.findall(r'\w+', text.lower().replace('ё', 'е'))
+    return stemmer.stemWords(words)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX post_text_search_idx ON posts_post '
+            "USING GIN (to_tsvector('russian', text))"
+        )
+    if vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        "body, tokenize='unicode61 remove_diacritics 2')"
+    )
+    Post = apps.get_model('posts', 'Post')
+    stemmer = snowballstemmer.stemmer('russian')
+    rows = [(pk, ' '.join(stem_words(stemmer, text)))
+            for pk, text in Post.objects.values_list('pk', 'text').iterator()]
+    with schema_editor.connection.cursor() as cursor:
+        for pk, body in rows:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [pk, body]
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX post_text_search_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:14
+
+import math
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Формула posts.hot.score и настройки HOT_* на момент миграции: код
+# и настройки могут измениться, а миграция должна считать так же.
+# Новые веса применяет manage.py rebuild_hot_scores.
+COMMENT_WEIGHT = 1.0
+FOLLOWER_WEIGHT = 0.1
+HALF_LIFE = 12 * 3600
+WINDOW = 3 * 24 * 3600
+
+
+def score(comments, followers, pub_date):
+    return (math.log2(1 + comments * COMMENT_WEIGHT
+                      + followers * FOLLOWER_WEIGHT)
+            + pub_date.timestamp() / HALF_LIFE)
+
+
+def score_recent_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    followers = dict(UserStats.objects.values_list('user_id', 'followers'))
+    posts = Post.objects.filter(
+        pub_date__gte=timezone.now() - timedelta(seconds=WINDOW)
+    ).only('id', 'author_id', 'comment_count', 'pub_date')
+    batch = []
+    for post in posts.iterator():
+        post.hot_score = score(post.comment_count,
+                               followers.get(post.author_id, 0),
+                               post.pub_date)
+        batch.append(post)
+    Post.objects.bulk_update(batch, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+        ),
+        migrations.RunPython(score_recent_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_generation(apps, schema_editor):
+    FeedGeneration = apps.get_model('posts', 'FeedGeneration')
+    FeedGeneration.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedGeneration',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1, verbose_name='Поколение')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Изменено')),
+            ],
+        ),
+        migrations.RunPython(create_generation, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.db.models.deletion import DO_NOTHING
+from django.utils import timezone
 from groups.models import Group
 
 User = get_user_model()
@@ -25,13 +26,54 @@ class Post(models.Model):
         help_text='Выберите сообщество (оционально)'
     )
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # Готовая миниатюра для ленты; пока пусто — показываем заглушку
+    thumbnail = models.CharField('Миниатюра', max_length=255, blank=True,
+                                 editable=False)
+    # Манифест вариантов миниатюры: {формат: [[ширина, имя файла], ...]}
+    image_variants = models.JSONField('Варианты картинки', default=dict,
+                                      blank=True, editable=False)
+    comment_count = models.PositiveIntegerField('Количество комментариев',
+                                                default=0, editable=False)
+    # Растёт при любом изменении того, что видно в карточке поста
+    version = models.PositiveIntegerField('Версия карточки', default=1,
+                                          editable=False)
+    # Оценка для вкладки популярных, см. posts.hot
+    hot_score = models.FloatField('Популярность', default=0, editable=False)
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date_idx'),
+            models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_url(self):
+        if not self.thumbnail:
+            return ''
+        return self.image.storage.url(self.thumbnail)
+
+    @property
+    def image_sources(self):
+        """
+        Пары (MIME-тип, srcset) для <source> внутри <picture>.
+        """
+        url = self.image.storage.url
+        return [
+            (f'image/{format_.lower()}', ', '.join(
+                f'{url(name)} {width}w' for width, name in variants
+            ))
+            for format_, variants in self.image_variants.items()
+        ]
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -43,6 +85,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created', )
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -59,3 +105,53 @@ class Follow(models.Model):
             models.UniqueConstraint(fields=['user', 'author'],
                                     name='user_author_constraint')
         ]
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats')
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    follows = models.PositiveIntegerField('Подписок', default=0)
+    posts = models.PositiveIntegerField('Записей', default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.followers}/{self.follows}/{self.posts}'
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='timeline_user_post_constraint')
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} <- {self.post_id}'
+
+
+class FeedGeneration(models.Model):
+    """
+    Поколение лент в единственной строке: растёт с правкой или удалением
+    поста, комментарием, готовой миниатюрой. В отличие от номера в кэше,
+    его видят одинаковым все процессы, поэтому по нему считаются ETag.
+    """
+    version = models.PositiveBigIntegerField('Поколение', default=1)
+    changed_at = models.DateTimeField('Изменено', default=timezone.now)
+
+    def __str__(self):
+        return f'{self.version} ({self.changed_at})'
@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+KEYS = ('pub_date', 'id')
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(obj, direction=NEXT, date_attr='pub_date'):
+    """
+    Упаковывает позицию записи (дата, id) в непрозрачный токен.
+    """
+    payload = json.dumps(
+        [direction, getattr(obj, date_attr).isoformat(), obj.pk],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, pub_date, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        pub_date = datetime.fromisoformat(pub_date)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (NEXT, PREVIOUS) or not isinstance(pk, int):
+        raise InvalidCursor(token)
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date, timezone.utc)
+    return direction, pub_date, pk
+
+
+def ordering(keys=KEYS):
+    return tuple(f'-{key}' for key in keys)
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<CursorPage of %s items>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1], NEXT,
+                                 self.paginator.date_attr)
+        return None
+
+    @cached_property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0], PREVIOUS,
+                                 self.paginator.date_attr)
+        return None
+
+
+class CursorPaginator:
+    """
+    Пагинация по ключу (pub_date, id): без OFFSET и без COUNT(*),
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    keys — пути к полям, по которым хранится этот ключ в запросе;
+    scope — условия на многозначную связь из keys, их нужно повторить
+    в том же filter(), иначе Django добавит к запросу ещё один JOIN.
+    """
+
+    def __init__(self, object_list, per_page, keys=KEYS, scope=None):
+        self.date_key, self.id_key = keys
+        self.date_attr = self.date_key.rsplit('__', 1)[-1]
+        self.scope = scope or {}
+        self.object_list = object_list.order_by(*ordering(keys))
+        self.per_page = int(per_page)
+
+    @cached_property
+    def count(self):
+        return self.object_list.count()
+
+    def page(self, cursor=None):
+        direction = NEXT
+        queryset = self.object_list
+        if cursor:
+            direction, pub_date, pk = decode_cursor(cursor)
+            lookup = 'lt' if direction == NEXT else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.date_key}__{lookup}': pub_date})
+                | Q(**{self.date_key: pub_date,
+                       f'{self.id_key}__{lookup}': pk}),
+                **self.scope
+            )
+            if direction == PREVIOUS:
+                queryset = queryset.order_by(self.date_key, self.id_key)
+
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+
+        if direction == PREVIOUS:
+            items.reverse()
+            return CursorPage(items, self, True, has_more)
+        return CursorPage(items, self, has_more, cursor is not None)
+
+
+def get_page(request, queryset, per_page=None, keys=KEYS, scope=None):
+    """
+    Возвращает страницу ленты: по ?cursor= — курсорную,
+    иначе обычную страницу Paginator с курсором на следующую.
+    """
+    per_page = per_page or settings.POSTS_PER_PAGES
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            return CursorPaginator(queryset, per_page, keys,
+                                   scope).page(cursor)
+        except InvalidCursor:
+            pass
+
+    paginator = Paginator(queryset.order_by(*ordering(keys)), per_page)
+    page = paginator.get_page(request.GET.get('page'))
+    page.is_cursor = False
+    page.next_cursor = None
+    if page.has_next() and len(page):
+        page.next_cursor = encode_cursor(page[-1], NEXT)
+    return page
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from groups.models import Group
+
+from . import hot, search
+from .caching import bump_card_version, bump_feed_version
+from .counters import drop_user_stats
+from .models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    bump_card_version(Post.objects.filter(group=instance))
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login, карточек он не меняет
+    if created or update_fields == frozenset(['last_login']):
+        return
+    bump_card_version(Post.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Так в индекс попадают и правки из админки или shell
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.remove_posts([instance.pk])
+    drop_user_stats(instance.author_id, posts=1)
+    transaction.on_commit(bump_feed_version)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Комментарий удалили из админки или каскадом вместе с автором;
+    # версия растёт, а не убывает: старая может быть в кэше карточек
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        version=F('version') + 1,
+        hot_score=hot.comments_changed(-1)
+    )
+    transaction.on_commit(bump_feed_version)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    # И отписка через writes.unfollow, и удаление из админки
+    drop_user_stats(instance.author_id, followers=1)
+    drop_user_stats(instance.user_id, follows=1)
+
+
+@receiver(pre_save, sender=Post)
+def post_scored(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw and not instance.hot_score:
+        # С auto_now_add дата станет «сейчас», какую бы ни задали
+        pub_date = (None if sender._meta.get_field('pub_date').auto_now_add
+                    else instance.pub_date)
+        instance.hot_score = hot.initial_score(instance.author_id, pub_date)
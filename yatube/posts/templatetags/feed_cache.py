@@ -0,0 +1,50 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+from posts.caching import get_or_compute
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout_var = timeout_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout_var.resolve(context))
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                '"feedcache" tag got a non-integer timeout value: %r'
+                % self.timeout_var.var
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_compute(key, lambda: self.nodelist.render(context),
+                              timeout)
+
+
+@register.tag('feedcache')
+def do_feedcache(parser, token):
+    """
+    Как {% cache %}, но через posts.caching.get_or_compute:
+    фрагмент пересчитывает один запрос, остальные получают
+    устаревшую копию или ждут.
+
+        {% feedcache 20 index_page page %} ... {% endfeedcache %}
+    """
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "'%r' tag requires at least 2 arguments." % tokens[0]
+        )
+    return FeedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
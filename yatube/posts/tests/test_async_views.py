@@ -0,0 +1,74 @@
+import asyncio
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from groups import views as group_views
+from groups.models import Group
+from posts import async_views, views
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Async-представления отдают ту же страницу, что и синхронные.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Тестовая группа')
+        cls.post = Post.objects.create(text='Пост', author=cls.author,
+                                       group=cls.group, comment_count=1)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def call(self, view, **kwargs):
+        cache.clear()
+        request = RequestFactory().get('/')
+        request.user = AsyncViewsTest.reader
+        if asyncio.iscoroutinefunction(view):
+            return async_to_sync(view)(request, **kwargs)
+        return view(request, **kwargs)
+
+    def test_same_pages(self):
+        """Ленты и страница поста совпадают с синхронными"""
+        cases = (
+            (views.index, async_views.index, {}),
+            (group_views.group_posts, async_views.group_posts,
+             {'slug': 'group'}),
+            (views.profile, async_views.profile, {'username': 'PavelZ'}),
+            (views.follow_index, async_views.follow_index, {}),
+        )
+        for sync_view, async_view, kwargs in cases:
+            with self.subTest(view=sync_view.__name__):
+                self.assertTrue(asyncio.iscoroutinefunction(async_view))
+                expected = self.call(sync_view, **kwargs)
+                actual = self.call(async_view, **kwargs)
+                self.assertEqual(actual.status_code, 200)
+                self.assertEqual(actual.content, expected.content)
+                self.assertEqual(actual.get('ETag'), expected.get('ETag'))
+
+    def test_post_view(self):
+        """Страница поста: автор, пост и комментарии читаются вместе"""
+        response = self.call(async_views.post_view, username='PavelZ',
+                             post_id=AsyncViewsTest.post.pk)
+        self.assertContains(response, 'Комментарий')
+        with self.assertRaises(Http404):
+            self.call(async_views.post_view, username='Reader',
+                      post_id=AsyncViewsTest.post.pk)
+
+    @override_settings(ASYNC_PARALLEL_QUERIES=True)
+    def test_gather_keeps_order(self):
+        """gather возвращает результаты в порядке вызовов"""
+        results = async_to_sync(async_views.gather)((max, 1, 2),
+                                                    (min, 1, 2))
+        self.assertEqual(list(results), [2, 1])
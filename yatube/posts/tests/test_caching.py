@@ -0,0 +1,56 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from posts.caching import (LOCK_PREFIX, cache_metrics, get_or_compute,
+                           reset_cache_metrics)
+
+
+@override_settings(FEED_CACHE_STALE=30, FEED_CACHE_LOCK_TIMEOUT=2,
+                   FEED_CACHE_POLL_INTERVAL=0.01)
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+
+    def test_single_flight(self):
+        """Одновременные промахи вычисляют значение один раз"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'страница'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('index_page:1', compute, 20)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['страница'] * 5)
+        metrics = cache_metrics()['index_page']
+        self.assertEqual(metrics['miss'], 5)
+        self.assertEqual(metrics['coalesced'], 4)
+
+    def test_stale_while_revalidate(self):
+        """Пока значение пересчитывается, отдаётся устаревшее"""
+        get_or_compute('card:1', lambda: 'старое', 0)
+        cache.add(LOCK_PREFIX + 'card:1', 1, 2)
+        self.assertEqual(get_or_compute('card:1', lambda: 'новое', 10),
+                         'старое')
+        cache.delete(LOCK_PREFIX + 'card:1')
+        self.assertEqual(get_or_compute('card:1', lambda: 'новое', 10),
+                         'новое')
+        self.assertEqual(get_or_compute('card:1', lambda: 'ещё', 10),
+                         'новое')
+        self.assertEqual(cache_metrics()['card'], {
+            'miss': 1, 'stale': 1, 'revalidate': 1, 'hit': 1
+        })
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from groups.models import Group
+from posts.models import Post
+from pytils.translit import slugify
+
+User = get_user_model()
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.group = Group.objects.create(title='Новая группа',
+                                         slug=slugify('Новая группа'),
+                                         description='Тестовая группа')
+        cls.post = Post.objects.create(text='Исходный текст',
+                                       author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostCardCacheTest.user)
+        self.profile_url = reverse('profile', kwargs={
+            'username': PostCardCacheTest.user.username
+        })
+
+    def test_card_shared_and_buttons_per_user(self):
+        """Карточка из кэша одна на всех, кнопки — у каждого свои"""
+        self.guest_client.get(self.profile_url)
+        Post.objects.filter(pk=PostCardCacheTest.post.pk).update(
+            text='Изменено в обход версии'
+        )
+        guest = self.guest_client.get(self.profile_url).content.decode()
+        author = self.authorized_client.get(
+            self.profile_url
+        ).content.decode()
+        self.assertIn('Исходный текст', guest)
+        self.assertIn('Исходный текст', author)
+        self.assertNotIn('Редактировать', guest)
+        self.assertIn('Редактировать', author)
+
+    def test_card_invalidated_on_edit_comment_and_group(self):
+        """Правка, комментарий и смена группы обновляют карточку"""
+        post = PostCardCacheTest.post
+        self.guest_client.get(self.profile_url)
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={'username': post.author.username,
+                                         'post_id': post.pk}),
+            {'text': 'Новый текст', 'group': post.group.pk}
+        )
+        self.assertContains(self.guest_client.get(self.profile_url),
+                            'Новый текст')
+
+        self.authorized_client.post(
+            reverse('add_comment', kwargs={'username': post.author.username,
+                                           'post_id': post.pk}),
+            {'text': 'Комментарий'}
+        )
+        self.assertContains(self.guest_client.get(self.profile_url),
+                            'Комментариев: 1')
+
+        group = PostCardCacheTest.group
+        group.title = 'Переименованная группа'
+        group.save()
+        self.assertContains(self.guest_client.get(self.profile_url),
+                            '#Переименованная группа')
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.counters import rebuild_comment_counts
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=4, COMMENTS_PER_CARD=2)
+class CommentPagesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.post = Post.objects.create(text='Вирусный пост', author=cls.user)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+            for i in range(10)
+        )
+        rebuild_comment_counts()
+        cls.comment_texts = [f'Коммент {i}' for i in range(9, -1, -1)]
+
+    def setUp(self):
+        self.client = Client()
+        self.comments_url = reverse('post_comments', kwargs={
+            'username': CommentPagesTest.user.username,
+            'post_id': CommentPagesTest.post.pk,
+        })
+
+    def test_post_view_embeds_first_page(self):
+        """Страница поста показывает только первую страницу комментариев"""
+        response = self.client.get(reverse('post', kwargs={
+            'username': CommentPagesTest.user.username,
+            'post_id': CommentPagesTest.post.pk,
+        }))
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         CommentPagesTest.comment_texts[:4])
+        self.assertContains(response, 'Показать ещё комментарии')
+
+    def test_json_endpoint_walks_all_comments(self):
+        """JSON-эндпоинт отдаёт все комментарии по курсору"""
+        texts = []
+        params = {'format': 'json'}
+        while True:
+            data = self.client.get(self.comments_url, params).json()
+            texts += [comment['text'] for comment in data['comments']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(texts, CommentPagesTest.comment_texts)
+
+    def test_invalid_cursor_first_page(self):
+        """Испорченный курсор — первая страница, а не ошибка"""
+        post_url = reverse('post', kwargs={
+            'username': CommentPagesTest.user.username,
+            'post_id': CommentPagesTest.post.pk,
+        })
+        for url in (post_url, self.comments_url):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'cursor': 'garbage'})
+                self.assertEqual(
+                    [comment.text for comment in response.context['comments']],
+                    CommentPagesTest.comment_texts[:4]
+                )
+
+    def test_html_fragment(self):
+        """HTML-фрагмент следующей страницы рендерится без базового шаблона"""
+        response = self.client.get(self.comments_url)
+        self.assertTemplateUsed(response, 'comments_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+
+    def test_feed_shows_latest_comments(self):
+        """Карточка в ленте показывает только последние комментарии"""
+        response = self.client.get(reverse('index'))
+        post = response.context['page'][0]
+        self.assertEqual([comment.text for comment in post.latest_comments],
+                         CommentPagesTest.comment_texts[:2])
+        self.assertContains(response, 'Все комментарии (10)')
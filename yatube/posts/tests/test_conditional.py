@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from groups.models import Group
+from posts.caching import feed_version
+from posts.models import Post
+
+User = get_user_model()
+
+
+class ConditionalFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group',
+                                         description='Тестовая группа')
+        Post.objects.create(text='Пост', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ConditionalFeedTest.reader)
+        self.urls = (
+            reverse('index'),
+            reverse('slug', kwargs={'slug': 'group'}),
+            reverse('profile', kwargs={'username': 'PavelZ'}),
+        )
+
+    def test_anonymous_not_modified(self):
+        """Анонимной ленте хватает валидатора, прокси может её хранить"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('public', response['Cache-Control'])
+                self.assertEqual(response['Vary'], 'Cookie')
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertLessEqual(len(captured), 2)
+
+    def test_validators_from_database(self):
+        """ETag не зависит от кэша процесса: другой воркер даст тот же"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                cache.clear()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_reads_no_posts(self):
+        """304 не читает строк постов, только индекс ленты"""
+        for url in self.urls[1:]:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(2) as captured:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertTrue(response['Last-Modified'])
+                queries = [query['sql'] for query in captured.captured_queries
+                           if 'posts_post' in query['sql']]
+                self.assertEqual(len(queries), 1)
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + queries[0])
+                    plan = [row[-1] for row in cursor.fetchall()]
+                self.assertIn('COVERING INDEX', plan[-1])
+                self.assertFalse([step for step in plan
+                                  if step.startswith('SCAN')])
+
+    def test_new_etag_new_page(self):
+        """С новым ETag страница не берётся из старого кэша"""
+        url = reverse('index')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text='Свежий пост',
+                            author=ConditionalFeedTest.author)
+        # Закэшированный ETag истёк, фрагмент страницы ещё в кэше
+        cache.delete(f'index_etag:{feed_version()}:anon')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Свежий пост')
+
+    def test_personal_feeds_differ(self):
+        """Авторизованному — своя, приватная версия страницы"""
+        url = reverse('profile', kwargs={'username': 'PavelZ'})
+        anonymous = self.client.get(url)
+        personal = self.reader_client.get(url)
+        self.assertNotEqual(anonymous['ETag'], personal['ETag'])
+        self.assertIn('private', personal['Cache-Control'])
+
+        self.reader_client.get(reverse('profile_follow',
+                                       kwargs={'username': 'PavelZ'}))
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=personal['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+    def test_missing_group(self):
+        """Несуществующее сообщество — по-прежнему 404"""
+        response = self.client.get(reverse('slug',
+                                           kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CommentCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.post = Post.objects.create(text='Пост с комментариями',
+                                       author=cls.user)
+        cls.empty_post = Post.objects.create(text='Пост без комментариев',
+                                             author=cls.user,
+                                             comment_count=7)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Коммент {i}')
+            for i in range(3)
+        )
+
+    def test_reconcile_fixes_drift(self):
+        """recount_comments исправляет разошедшиеся счётчики"""
+        out = StringIO()
+        call_command('recount_comments', '--dry-run', stdout=out)
+        self.assertIn('Найдено расхождений: 2', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 0)
+
+        call_command('recount_comments', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comment_count, 3)
+        self.assertEqual(
+            Post.objects.get(pk=self.empty_post.pk).comment_count, 0
+        )
+
+    def test_rebuild(self):
+        """recount_comments --rebuild пересчитывает все посты"""
+        call_command('recount_comments', '--rebuild', stdout=StringIO())
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'comment_count', flat=True
+            )),
+            [3, 0]
+        )
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(UserStatsTest.reader)
+
+    def test_follow_unfollow_and_post_update_stats(self):
+        """Подписка, отписка и новый пост обновляют UserStats"""
+        author = UserStatsTest.author
+        self.reader_client.get(reverse('profile_follow',
+                                       kwargs={'username': author.username}))
+        self.reader_client.get(reverse('profile_follow',
+                                       kwargs={'username': author.username}))
+        self.reader_client.post(reverse('new_post'), {'text': 'Пост'})
+        self.assertEqual(UserStats.objects.get(user=author).followers, 1)
+        reader_stats = UserStats.objects.get(user=UserStatsTest.reader)
+        self.assertEqual((reader_stats.follows, reader_stats.posts), (1, 1))
+
+        self.reader_client.get(reverse('profile_unfollow',
+                                       kwargs={'username': author.username}))
+        self.assertEqual(UserStats.objects.get(user=author).followers, 0)
+
+    def test_deletions_update_stats(self):
+        """Удаление поста и подписки мимо представлений тоже учтено"""
+        author = UserStatsTest.author
+        self.reader_client.get(reverse('profile_follow',
+                                       kwargs={'username': author.username}))
+        self.reader_client.post(reverse('new_post'), {'text': 'Пост'})
+        Post.objects.get(text='Пост').delete()
+        Follow.objects.filter(author=author).delete()
+        self.assertEqual(UserStats.objects.get(user=author).followers, 0)
+        reader_stats = UserStats.objects.get(user=UserStatsTest.reader)
+        self.assertEqual((reader_stats.follows, reader_stats.posts), (0, 0))
+
+        # Каскад при удалении автора не пересоздаёт его запись
+        leaving = User.objects.create_user(username='Leaving')
+        client = Client()
+        client.force_login(leaving)
+        client.post(reverse('new_post'), {'text': 'Пост'})
+        leaving_id = leaving.pk
+        leaving.delete()
+        self.assertFalse(UserStats.objects.filter(user_id=leaving_id).exists())
+
+    def test_reconcile_creates_missing_stats(self):
+        """recount_user_stats создаёт недостающие записи"""
+        Post.objects.create(text='Пост', author=UserStatsTest.author)
+        call_command('recount_user_stats', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.get(user=UserStatsTest.author).posts, 1
+        )
+        self.assertEqual(UserStats.objects.count(), 2)
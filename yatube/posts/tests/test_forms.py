@@ -1,12 +1,15 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from groups.models import Group
+from PIL import Image, ImageFile
 from posts.models import Post, User
 from pytils.translit import slugify
 
@@ -139,3 +142,97 @@ class PostCreateFormTests(TestCase):
         ))
         self.assertEqual(last_comment.text, 'Новый комментарий')
         self.assertEqual(last_comment.author, PostCreateFormTests.user)
+        PostCreateFormTests.post.refresh_from_db()
+        self.assertEqual(PostCreateFormTests.post.comment_count,
+                         PostCreateFormTests.post.comments.count())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(),
+                   TASK_BROKER='core.tasks.ImmediateBroker')
+class PostImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostImageUploadTests.user)
+
+    def upload_jpeg(self, size=(40, 20)):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: повернуть на 90°
+        exif[0x010F] = 'Camera'  # Make
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name='photo.jpg',
+                                  content=buffer.getvalue(),
+                                  content_type='image/jpeg')
+
+    def post_image(self, image):
+        return self.authorized_client.post(reverse('new_post'), {
+            'text': 'Пост с фото', 'image': image
+        })
+
+    def test_exif_stripped_once(self):
+        """EXIF учтён при повороте и выброшен из сохранённого файла"""
+        self.post_image(self.upload_jpeg())
+        post = Post.objects.get(text='Пост с фото')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_too_large_rejected(self):
+        """Файл сверх лимита байт не принимается"""
+        response = self.post_image(self.upload_jpeg())
+        self.assertFormError(response, 'form', 'image',
+                             'Файл больше 0 МБ.')
+        self.assertFalse(Post.objects.filter(text='Пост с фото').exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=500)
+    def test_too_many_pixels_rejected(self):
+        """Картинка больше лимита пикселей отсекается по заголовку"""
+        with mock.patch.object(ImageFile.ImageFile, 'verify') as verify:
+            response = self.post_image(self.upload_jpeg(size=(40, 40)))
+        verify.assert_not_called()
+        self.assertFormError(response, 'form', 'image',
+                             'Картинка больше 0 мегапикселей.')
+
+    def test_animation_kept(self):
+        """Перекодирование не сводит анимированный GIF к одному кадру"""
+        frames = [Image.new('RGB', (10, 10), color)
+                  for color in ('red', 'green', 'blue')]
+        buffer = BytesIO()
+        frames[0].save(buffer, 'GIF', save_all=True,
+                       append_images=frames[1:], duration=100, loop=0)
+        self.post_image(SimpleUploadedFile(name='anim.gif',
+                                           content=buffer.getvalue(),
+                                           content_type='image/gif'))
+        post = Post.objects.get(text='Пост с фото')
+        with Image.open(post.image.path) as image:
+            self.assertTrue(image.is_animated)
+            self.assertEqual(image.n_frames, 3)
+
+    def test_mpo_saved_as_jpeg(self):
+        """MPO с камеры повёрнут по EXIF и сохранён обычным JPEG"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: повернуть на 90°
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(
+            buffer, 'MPO', save_all=True, exif=exif,
+            append_images=[Image.new('RGB', (40, 20), 'blue')]
+        )
+        self.post_image(SimpleUploadedFile(name='photo.jpg',
+                                           content=buffer.getvalue(),
+                                           content_type='image/jpeg'))
+        post = Post.objects.get(text='Пост с фото')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (20, 40))
+            self.assertFalse(image.getexif())
@@ -0,0 +1,49 @@
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+from groups.models import Group
+from posts.models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class GenerateDataTest(TestCase):
+    def test_generate(self):
+        """Создаёт данные с перекосом популярности и пересчитывает счётчики"""
+        call_command('generate_data', users=50, groups=3, posts=2000,
+                     comments=500, follows=200, seed=1, batch=300,
+                     stdout=StringIO())
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 2000)
+        self.assertEqual(Comment.objects.count(), 500)
+        self.assertEqual(Follow.objects.count(), 200)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+
+        authors = Counter(Post.objects.values_list('author_id', flat=True))
+        (_, top), = authors.most_common(1)
+        self.assertGreater(top, 2000 / 50 * 3)
+
+        dates = list(Post.objects.order_by('pk').values_list('pub_date',
+                                                             flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater(dates[-1] - dates[0], timedelta(days=300))
+
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        stats = UserStats.objects.get(user=post.author)
+        self.assertEqual(stats.posts, post.author.posts.count())
+
+    def test_repeat_run(self):
+        """Повторный запуск дописывает данные, а не падает на именах"""
+        for seed in (1, 2):
+            call_command('generate_data', users=5, groups=1, posts=10,
+                         comments=0, follows=0, seed=seed,
+                         stdout=StringIO())
+        self.assertEqual(User.objects.count(), 10)
+        self.assertEqual(Group.objects.count(), 2)
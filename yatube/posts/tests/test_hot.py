@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from posts import hot, writes
+from posts.generator import explicit_dates
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(HOT_COMMENT_WEIGHT=1.0, HOT_FOLLOWER_WEIGHT=0.1,
+                   HOT_HALF_LIFE=3600)
+class ScoreTest(SimpleTestCase):
+    def test_half_life(self):
+        """Пост на HOT_HALF_LIFE старше равен вдвое менее весомому"""
+        now = timezone.now()
+        older = now - timedelta(seconds=3600)
+        self.assertAlmostEqual(hot.score(1, 0, older), hot.score(0, 0, now))
+        self.assertGreater(hot.score(0, 0, now), hot.score(0, 0, older))
+        self.assertGreater(hot.score(5, 0, older), hot.score(0, 0, now))
+
+
+@override_settings(HOT_SIZE=3)
+class HotTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.author)
+        cls.popular = Post.objects.create(text='Обсуждаемый пост',
+                                          author=cls.author)
+        cls.old = Post.objects.create(text='Старый пост', author=cls.author)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(HotTest.reader)
+
+    def assertScoresMatchRebuild(self):
+        # Посты старше окна подписки не трогают
+        recent = Post.objects.filter(pub_date__gte=hot.window_start())
+        stored = dict(recent.values_list('pk', 'hot_score'))
+        self.assertEqual(hot.rebuild(), 2)
+        for pk, score in recent.values_list('pk', 'hot_score'):
+            self.assertAlmostEqual(stored[pk], score, places=6)
+
+    def test_incremental_matches_rebuild(self):
+        """Комментарии и подписки сдвигают оценку как полный пересчёт"""
+        hot.rebuild(Post.objects.all())
+        for _ in range(3):
+            writes.add_comment(self.popular.pk, self.reader.pk, 'Да!')
+        writes.follow(self.reader.pk, self.author.pk)
+        self.assertScoresMatchRebuild()
+        writes.unfollow(self.reader.pk, self.author.pk)
+        self.assertScoresMatchRebuild()
+
+    def test_comment_deleted(self):
+        """Удалённый комментарий вычитается из счётчика и оценки"""
+        hot.rebuild(Post.objects.all())
+        for _ in range(2):
+            writes.add_comment(self.popular.pk, self.reader.pk, 'Да!')
+        version = Post.objects.get(pk=self.popular.pk).version
+        Comment.objects.filter(post=self.popular).first().delete()
+        post = Post.objects.get(pk=self.popular.pk)
+        self.assertEqual(post.comment_count, 1)
+        self.assertGreater(post.version, version)
+        self.assertScoresMatchRebuild()
+
+    def test_new_post_scored(self):
+        """Новый пост сразу получает оценку, а не 0"""
+        self.assertAlmostEqual(
+            self.quiet.hot_score,
+            hot.score(0, 0, Post.objects.get(pk=self.quiet.pk).pub_date),
+            places=2
+        )
+
+    def test_explicit_date_scored(self):
+        """Пост с заданной датой оценивается по ней, а не по «сейчас»"""
+        pub_date = timezone.now() - timedelta(days=1)
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            post = Post.objects.create(text='Перенесённый пост',
+                                       author=self.author, pub_date=pub_date)
+        self.assertAlmostEqual(post.hot_score, hot.score(0, 0, pub_date))
+
+    def test_hot_tab(self):
+        """Вкладка: сначала обсуждаемые, посты вне окна не попадают"""
+        writes.add_comment(self.popular.pk, self.reader.pk, 'Да!')
+        response = self.client.get(reverse('hot_index'))
+        self.assertEqual([post.pk for post in response.context['page']],
+                         [self.popular.pk, self.quiet.pk])
+        self.assertContains(response, reverse('hot_index'))
+
+    def test_rebuild_command(self):
+        Post.objects.update(hot_score=0)
+        out = StringIO()
+        call_command('rebuild_hot_scores', '--all', stdout=out)
+        self.assertIn('Пересчитано постов: 3', out.getvalue())
+        self.assertFalse(Post.objects.filter(hot_score=0).exists())
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.images import make_thumbnail
+from posts.models import Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(),
+                   TASK_BROKER='core.tasks.ImmediateBroker')
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        return super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ThumbnailTest.user)
+
+    def upload(self):
+        return SimpleUploadedFile(name='small.gif', content=SMALL_GIF,
+                                  content_type='image/gif')
+
+    def test_thumbnail_made_after_commit(self):
+        """Миниатюра режется после сохранения, до того — заглушка"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.authorized_client.post(reverse('new_post'), {
+                'text': 'Пост с картинкой', 'image': self.upload()
+            })
+        post = Post.objects.get(text='Пост с картинкой')
+        self.assertEqual(post.thumbnail, '')
+        response = self.authorized_client.get(reverse('profile', kwargs={
+            'username': ThumbnailTest.user.username
+        }))
+        self.assertContains(response, 'bg-light')
+
+        for callback in callbacks:
+            callback()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        response = self.authorized_client.get(reverse('profile', kwargs={
+            'username': ThumbnailTest.user.username
+        }))
+        self.assertContains(response, post.thumbnail_url)
+        self.assertContains(response, 'type="image/webp"')
+
+    def test_variants_manifest(self):
+        """Для каждого формата есть все ширины, в srcset — с дескрипторами"""
+        post = Post.objects.create(text='Пост с вариантами', author=self.user,
+                                   image=self.upload())
+        make_thumbnail(post.pk, post.image.name)
+        post.refresh_from_db()
+        self.assertEqual(list(post.image_variants),
+                         list(settings.POST_IMAGE_FORMATS))
+        for format_, variants in post.image_variants.items():
+            with self.subTest(format=format_):
+                self.assertEqual([width for width, _ in variants],
+                                 sorted(settings.POST_IMAGE_WIDTHS))
+                self.assertTrue(all(
+                    name.endswith('.' + format_.lower().replace('jpeg', 'jpg'))
+                    for _, name in variants
+                ))
+        self.assertTrue(post.thumbnail.endswith('.jpg'))
+        sources = dict(post.image_sources)
+        self.assertIn(f'{max(settings.POST_IMAGE_WIDTHS)}w',
+                      sources['image/webp'])
+
+    def test_warm_thumbnails_command(self):
+        """warm_thumbnails нарезает миниатюры для старых постов"""
+        post = Post.objects.create(text='Старый пост', author=self.user,
+                                   image=self.upload())
+        out = StringIO()
+        call_command('warm_thumbnails', '--workers', '1', stdout=out)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail)
+        self.assertIn('Готово: 1, ошибок: 0', out.getvalue())
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post
+from posts.paginators import (CursorPaginator, InvalidCursor, decode_cursor,
+                              encode_cursor)
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user) for i in range(25)
+        )
+        cls.ordered = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def test_cursor_roundtrip(self):
+        """Курсор кодируется и раскодируется без потерь"""
+        post = CursorPaginatorTest.ordered[3]
+        direction, pub_date, pk = decode_cursor(encode_cursor(post))
+        self.assertEqual((pub_date, pk), (post.pub_date, post.pk))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('мусор')
+
+    def test_walk_forward_and_back(self):
+        """Проход по курсорам вперёд и назад выдаёт те же посты"""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        pages = [paginator.page()]
+        while pages[-1].next_cursor:
+            pages.append(paginator.page(pages[-1].next_cursor))
+        walked = [post for page in pages for post in page]
+        self.assertEqual(walked, CursorPaginatorTest.ordered)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+
+        back = paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        self.assertTrue(back.has_previous())
+
+    def test_index_accepts_cursor(self):
+        """Главная отдаёт курсорную страницу по ?cursor="""
+        client = Client()
+        first = client.get(reverse('index')).context['page']
+        response = client.get(reverse('index'),
+                              {'cursor': first.next_cursor})
+        self.assertEqual(list(response.context['page']),
+                         CursorPaginatorTest.ordered[10:20])
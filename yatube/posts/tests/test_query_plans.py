@@ -0,0 +1,94 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from groups.models import Group
+from posts.models import Comment, Follow, Post
+from pytils.translit import slugify
+
+User = get_user_model()
+
+FEED_TABLES = ('"posts_post"', '"posts_comment"', '"posts_timelineentry"')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'планы запросов SQLite')
+class QueryPlanTest(TestCase):
+    """
+    Каждый запрос ленты к постам и комментариям должен
+    читать данные по индексу и не сортировать их отдельно.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Новая группа',
+                                         slug=slugify('Новая группа'),
+                                         description='Тестовая группа')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(30)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(QueryPlanTest.reader)
+
+    def assert_no_sort(self, url, allow_sort=False):
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(url, {'page': 2})
+        checked = 0
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'ORDER BY' not in sql:
+                continue
+            if not any(table in sql for table in FEED_TABLES):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' | '.join(row[-1] for row in cursor.fetchall())
+            checked += 1
+            if not allow_sort:
+                self.assertNotIn('TEMP B-TREE', plan, f'{url}: {sql}\n{plan}')
+            self.assertIn('INDEX', plan, f'{url}: {sql}\n{plan}')
+        self.assertGreater(checked, 0, url)
+
+    def test_feeds_use_indexes(self):
+        """Ленты читаются по индексу без сортировки"""
+        urls = (
+            reverse('index'),
+            reverse('slug', kwargs={'slug': QueryPlanTest.group.slug}),
+            reverse('profile',
+                    kwargs={'username': QueryPlanTest.user.username}),
+            reverse('post', kwargs={'username': QueryPlanTest.user.username,
+                                    'post_id': QueryPlanTest.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_no_sort(url)
+
+    def test_follow_join_uses_indexes(self):
+        """
+        JOIN по подпискам сливает ленты нескольких авторов и сортирует их,
+        но каждого автора читает по индексу (author, -pub_date).
+        """
+        self.assert_no_sort(reverse('follow_index'), allow_sort=True)
+
+    @override_settings(FEED_FANOUT=True)
+    def test_fanout_feed_uses_index(self):
+        """Материализованная лента читается по индексу"""
+        self.client.get(reverse('profile_unfollow', kwargs={
+            'username': QueryPlanTest.user.username
+        }))
+        self.client.get(reverse('profile_follow', kwargs={
+            'username': QueryPlanTest.user.username
+        }))
+        self.assert_no_sort(reverse('follow_index'))
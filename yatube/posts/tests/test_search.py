@@ -0,0 +1,94 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'индекс FTS5')
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='PavelZ')
+        cls.cats = Post.objects.create(
+            text='Коты и котята: про котов можно писать бесконечно',
+            author=cls.user
+        )
+        cls.cat = Post.objects.create(text='Сегодня видел кота на крыше',
+                                      author=cls.user)
+        cls.dog = Post.objects.create(text='Собака лает, караван идёт',
+                                      author=cls.user)
+        search.rebuild()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(SearchTest.user)
+
+    def test_russian_stemming(self):
+        """Находит другие формы слова, лучшее совпадение — первым"""
+        self.assertEqual(search.search('коты'),
+                         [SearchTest.cats.pk, SearchTest.cat.pk])
+        self.assertEqual(search.search('крышами'),
+                         [SearchTest.cat.pk])
+        self.assertEqual(search.search('"); DROP'), [])
+        self.assertEqual(search.search('  '), [])
+
+    def test_search_page(self):
+        """Страница поиска показывает найденные посты"""
+        response = self.client.get(reverse('search'), {'q': 'собаки'})
+        self.assertEqual(list(response.context['page']), [SearchTest.dog])
+        self.assertContains(response, 'караван')
+
+    def test_index_updated_on_write(self):
+        """Новый и отредактированный посты сразу попадают в индекс"""
+        self.authorized_client.post(reverse('new_post'),
+                                    {'text': 'Попугай говорит'})
+        post = Post.objects.get(text='Попугай говорит')
+        self.assertEqual(search.search('попугаи'), [post.pk])
+
+        self.authorized_client.post(reverse('post_edit', kwargs={
+            'username': SearchTest.user.username, 'post_id': post.pk
+        }), {'text': 'Хомяк молчит'})
+        self.assertEqual(search.search('попугаи'), [])
+        self.assertEqual(search.search('хомяка'), [post.pk])
+
+    def test_saved_post_indexed(self):
+        """Правка мимо представлений (админка, shell) тоже в индексе"""
+        post = Post.objects.create(text='Черепаха спит', author=self.user)
+        self.assertEqual(search.search('черепахи'), [post.pk])
+        post.text = 'Ящерица греется'
+        post.save()
+        self.assertEqual(search.search('черепахи'), [])
+        self.assertEqual(search.search('ящерицу'), [post.pk])
+
+    def test_rebuild_command(self):
+        """rebuild_search переиндексирует все посты"""
+        out = StringIO()
+        call_command('rebuild_search', stdout=out)
+        self.assertIn(f'Проиндексировано постов: {Post.objects.count()}',
+                      out.getvalue())
+        self.assertEqual(search.search('кот'),
+                         [SearchTest.cats.pk, SearchTest.cat.pk])
+
+    def test_deleted_post_removed(self):
+        """Удалённый пост уходит из индекса"""
+        post = Post.objects.create(text='Черепаха спит', author=self.user)
+        post.delete()
+        self.assertEqual(search.search('черепаха'), [])
+
+    def test_index_in_chunks(self):
+        """Посты индексируются пачками меньше лимита параметров SQLite"""
+        posts = Post.objects.bulk_create(
+            Post(text=f'Ёжик номер {i}', author=self.user)
+            for i in range(search.INDEX_CHUNK + 1)
+        )
+        search.index_posts(Post.objects.filter(text__startswith='Ёжик'))
+        self.assertEqual(len(search.search('ежик')), len(posts))
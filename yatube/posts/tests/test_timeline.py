@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, TimelineEntry, UserStats
+from posts.paginators import encode_cursor
+
+User = get_user_model()
+
+
+@override_settings(FEED_FANOUT=True, FEED_INBOX_SIZE=5,
+                   FEED_CELEBRITY_FOLLOWERS=2,
+                   TASK_BROKER='core.tasks.ImmediateBroker')
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='PavelZ')
+        cls.reader = User.objects.create_user(username='Reader')
+        Post.objects.bulk_create(
+            Post(text=f'Старый пост {i}', author=cls.author)
+            for i in range(7)
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(TimelineTest.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(TimelineTest.reader)
+
+    def follow(self, client, author, action='profile_follow'):
+        client.get(reverse(action, kwargs={'username': author.username}))
+
+    def feed(self):
+        response = self.reader_client.get(reverse('follow_index'))
+        return list(response.context['page'])
+
+    def test_follow_backfills_and_trims(self):
+        """Подписка переносит последние посты автора во входящие"""
+        self.follow(self.reader_client, TimelineTest.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).count(), 5
+        )
+        self.assertEqual(len(self.feed()), 5)
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=10)
+    def test_inbox_cursor_pagination(self):
+        """Курсор по входящим не подхватывает чужие записи"""
+        other = User.objects.create_user(username='Other')
+        for user in (TimelineTest.reader, other):
+            client = Client()
+            client.force_login(user)
+            self.follow(client, TimelineTest.author)
+        first = list(self.feed())
+        response = self.reader_client.get(reverse('follow_index'),
+                                          {'cursor': encode_cursor(first[1])})
+        self.assertEqual(list(response.context['page']), first[2:])
+
+    def test_new_post_fans_out_and_unfollow_clears(self):
+        """Новый пост попадает во входящие, отписка их очищает"""
+        self.follow(self.reader_client, TimelineTest.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(reverse('new_post'),
+                                    {'text': 'Свежий пост'})
+        self.assertEqual(self.feed()[0].text, 'Свежий пост')
+
+        self.follow(self.reader_client, TimelineTest.author,
+                    'profile_unfollow')
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=TimelineTest.reader).exists()
+        )
+        self.assertEqual(self.feed(), [])
+
+    def test_celebrity_posts_pulled_on_read(self):
+        """Посты «знаменитости» не раскладываются, а читаются напрямую"""
+        self.follow(self.reader_client, TimelineTest.author)
+        UserStats.objects.filter(user=TimelineTest.author).update(followers=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(reverse('new_post'),
+                                    {'text': 'Пост знаменитости'})
+        self.assertFalse(TimelineEntry.objects.filter(
+            post__text='Пост знаменитости'
+        ).exists())
+        self.assertEqual(self.feed()[0].text, 'Пост знаменитости')
+        self.assertEqual(len(self.feed()), 8)
+
+    def test_inbox_trimmed_on_read(self):
+        """Раскладка только добавляет, лишнее убирает чтение ленты"""
+        self.follow(self.reader_client, TimelineTest.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(reverse('new_post'),
+                                    {'text': 'Свежий пост'})
+        inbox = TimelineEntry.objects.filter(user=TimelineTest.reader)
+        self.assertEqual(inbox.count(), 6)
+        self.assertEqual(self.feed()[0].text, 'Свежий пост')
+        self.assertEqual(inbox.count(), 5)
+        self.assertEqual(inbox.first().post.text, 'Свежий пост')
+
+    def test_trim_command(self):
+        """rebuild_timelines --trim обрезает входящие тех, кто не читает"""
+        self.follow(self.reader_client, TimelineTest.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(reverse('new_post'),
+                                    {'text': 'Свежий пост'})
+        call_command('rebuild_timelines', trim=True, stdout=StringIO())
+        inbox = TimelineEntry.objects.filter(user=TimelineTest.reader)
+        self.assertEqual(inbox.count(), 5)
+        self.assertEqual(inbox.first().post.text, 'Свежий пост')
+
+    def test_former_celebrity_posts_refilled(self):
+        """Посты, написанные выше порога, не пропадают, когда автор ниже"""
+        other = User.objects.create_user(username='Other')
+        other_client = Client()
+        other_client.force_login(other)
+        self.follow(self.reader_client, TimelineTest.author)
+        self.follow(other_client, TimelineTest.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author_client.post(reverse('new_post'),
+                                    {'text': 'Пост знаменитости'})
+        self.assertEqual(self.feed()[0].text, 'Пост знаменитости')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.follow(other_client, TimelineTest.author,
+                        'profile_unfollow')
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=TimelineTest.reader, post__text='Пост знаменитости'
+        ).exists())
+        self.assertEqual(self.feed()[0].text, 'Пост знаменитости')
+        self.assertEqual(len(self.feed()), 5)
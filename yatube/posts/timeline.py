@@ -0,0 +1,176 @@
+from core.tasks import task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Follow, Post, TimelineEntry, UserStats
+
+# Во входящих дата и id поста продублированы, по ним и сортируем,
+# чтобы страница читалась диапазоном индекса timeline_user_date_idx.
+INBOX_KEYS = ('timeline__pub_date', 'timeline__post_id')
+
+
+def is_enabled():
+    return getattr(settings, 'FEED_FANOUT', False)
+
+
+def celebrity_ids():
+    """
+    Авторы, чьи посты не раскладываются по лентам при записи,
+    а подтягиваются при чтении.
+    """
+    return UserStats.objects.filter(
+        followers__gte=settings.FEED_CELEBRITY_FOLLOWERS
+    ).values('user')
+
+
+def _is_celebrity(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id, followers__gte=settings.FEED_CELEBRITY_FOLLOWERS
+    ).exists()
+
+
+def _fan_out(author_id, posts):
+    """
+    Кладёт posts — пары (id, дата публикации) — во входящие всех
+    подписчиков автора. Только вставка: обрезать входящие всех
+    подписчиков значило бы перебрать их записи целиком, поэтому
+    лишнее сверх FEED_INBOX_SIZE убирает чтение ленты (см. feed).
+    """
+    followers = Follow.objects.filter(author_id=author_id).values_list(
+        'user_id', flat=True
+    )
+    created = 0
+    batch = []
+    with transaction.atomic():
+        for user_id in followers.iterator(
+            chunk_size=settings.FEED_FANOUT_BATCH
+        ):
+            batch.extend(TimelineEntry(user_id=user_id, post_id=pk,
+                                       author_id=author_id,
+                                       pub_date=pub_date)
+                         for pk, pub_date in posts)
+            if len(batch) >= settings.FEED_FANOUT_BATCH:
+                created += len(TimelineEntry.objects.bulk_create(
+                    batch, ignore_conflicts=True
+                ))
+                batch = []
+        created += len(TimelineEntry.objects.bulk_create(
+            batch, ignore_conflicts=True
+        ))
+    return created
+
+
+def fan_out_post(post):
+    """
+    Кладёт новый пост во входящие всех подписчиков автора.
+    """
+    if not is_enabled() or _is_celebrity(post.author_id):
+        return 0
+    return _fan_out(post.author_id, [(post.pk, post.pub_date)])
+
+
+@task()
+def fan_out(post_id):
+    """Фоновая задача: fan_out_post для поста, если он ещё есть."""
+    post = Post.objects.filter(pk=post_id).only('author', 'pub_date').first()
+    return fan_out_post(post) if post else 0
+
+
+@task()
+def refill(author_id):
+    """
+    Автор перестал быть «знаменитостью», и его посты больше
+    не читаются напрямую: раскладывает последние FEED_INBOX_SIZE
+    из них по входящим подписчиков, включая написанные, пока он
+    был выше порога.
+    """
+    if not is_enabled() or _is_celebrity(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('pk', 'pub_date')[:settings.FEED_INBOX_SIZE]
+    return _fan_out(author_id, list(posts))
+
+
+def followers_decreased(author_id):
+    """
+    Вызывать, когда у автора стало на подписчика меньше: если он
+    только что опустился ниже FEED_CELEBRITY_FOLLOWERS, ставит refill.
+    """
+    if is_enabled() and UserStats.objects.filter(
+        user_id=author_id,
+        followers=settings.FEED_CELEBRITY_FOLLOWERS - 1
+    ).exists():
+        refill.delay(author_id)
+
+
+def backfill(user_id, author_id):
+    """
+    После подписки переносит во входящие последние посты автора.
+    """
+    if not is_enabled() or _is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('pk', 'pub_date')[:settings.FEED_INBOX_SIZE]
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id, post_id=pk, author_id=author_id,
+                       pub_date=pub_date) for pk, pub_date in posts),
+        ignore_conflicts=True
+    )
+    trim(user_id)
+
+
+def remove_author(user_id, author_id):
+    if not is_enabled():
+        return
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+    trim(user_id)
+
+
+def trim(user_id):
+    """
+    Оставляет во входящих не больше FEED_INBOX_SIZE последних записей.
+    """
+    boundary = TimelineEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-post_id'
+    ).values_list('pub_date', 'post_id')[
+        settings.FEED_INBOX_SIZE:settings.FEED_INBOX_SIZE + 1
+    ]
+    for pub_date, post_id in boundary:
+        TimelineEntry.objects.filter(user_id=user_id).filter(
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date,
+                                         post_id__lte=post_id)
+        ).delete()
+
+
+def rebuild(user_id):
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    for author_id in Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True
+    ):
+        backfill(user_id, author_id)
+
+
+def feed(user):
+    """
+    Лента подписок и аргументы её пагинации: входящие пользователя
+    плюс посты «знаменитостей», которые читаются напрямую.
+    Заодно обрезает входящие читателя до FEED_INBOX_SIZE.
+    Без FEED_FANOUT — прежний JOIN по Follow.
+    """
+    if not is_enabled():
+        return Post.objects.filter(author__following__user=user), {}
+    trim(user.pk)
+    celebrities = Follow.objects.filter(
+        user=user, author__in=celebrity_ids()
+    ).values('author')
+    if not celebrities.exists():
+        return Post.objects.filter(timeline__user=user), {
+            'keys': INBOX_KEYS, 'scope': {'timeline__user': user}
+        }
+    inbox = TimelineEntry.objects.filter(user=user).values('post')
+    return Post.objects.filter(
+        Q(pk__in=inbox) | Q(author__in=celebrities)
+    ), {}
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUpload(UploadedFile):
+    """
+    Файл, превысивший POST_IMAGE_MAX_BYTES: содержимое отброшено,
+    известны только имя и сколько байт успело прийти.
+    """
+
+    def __init__(self, name, content_type, size, charset):
+        super().__init__(None, name, content_type, size, charset)
+
+    def open(self, mode=None):
+        return self
+
+    def read(self, *args, **kwargs):
+        return b''
+
+    def close(self):
+        pass
+
+
+class LimitedUploadHandler(FileUploadHandler):
+    """
+    Первый в FILE_UPLOAD_HANDLERS: считает байты файла и, как только
+    их больше POST_IMAGE_MAX_BYTES, перестаёт передавать куски дальше,
+    так что ни память, ни временный файл не растут.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return OversizedUpload(self.file_name, self.content_type,
+                                   self.received, self.charset)
+        return None
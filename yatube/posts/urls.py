@@ -1,17 +1,26 @@
+from django.conf import settings
 from django.urls import include, path
 
-from . import views
+from . import async_views, views
+
+# Ленты и страница поста: под ASGI — async-версии
+feed_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path("", views.index, name="index"),
+    path("", feed_views.index, name="index"),
     path("new/", views.new_post, name="new_post"),
     path("about/", include('about.urls', namespace='about')),
-    path("follow/", views.follow_index, name="follow_index"),
-    path("<str:username>/", views.profile, name='profile'),
-    path("<str:username>/<int:post_id>/", views.post_view, name='post'),
+    path("follow/", feed_views.follow_index, name="follow_index"),
+    path("hot/", views.hot_index, name="hot_index"),
+    path("search/", views.search_posts, name="search"),
+    path("<str:username>/", feed_views.profile, name='profile'),
+    path("<str:username>/<int:post_id>/", feed_views.post_view, name='post'),
     path("<str:username>/<int:post_id>/edit/",
          views.post_edit,
          name='post_edit'),
+    path("<str:username>/<int:post_id>/comments/",
+         views.post_comments,
+         name="post_comments"),
     path("<str:username>/<int:post_id>/comment/",
          views.add_comment,
          name="add_comment"),
@@ -1,40 +1,124 @@
+from core.budgets import query_budget
+from core.ratelimit import rate_limit
+from core.writebehind import run_write, unavailable_on_timeout
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from . import hot, search, timeline, writes
+from .caching import bump_card_version, feed_version, get_or_compute
+from .comments import attach_latest_comments, comment_page
+from .conditional import condition_feed, feed_validators, viewer
+from .counters import bump_user_stats, get_user_stats
 from .forms import CommentForm, PostForm
-from .models import Follow, Post, User
+from .images import schedule_thumbnail
+from .models import Post, User
+from .paginators import KEYS, get_page
 
 
+# Столько живёт кэш страницы в index.html. ETag главной кэшируется
+# столько же и входит в ключ фрагмента: новый ETag — новый фрагмент,
+# поэтому страница из кэша не бывает старше своего валидатора
+INDEX_CACHE_SECONDS = 20
+
+
+def _index_validators(request):
+    return get_or_compute(
+        f'index_etag:{feed_version()}:{viewer(request)}',
+        lambda: feed_validators(Post.objects.all(), KEYS, viewer(request)),
+        INDEX_CACHE_SECONDS
+    )
+
+
+def _load_profile(request, username):
+    """
+    Автор, его счётчики и подписан ли на него читатель. Первым их
+    читает валидатор, представление берёт ту же выборку из request.
+    """
+    loaded = getattr(request, 'profile_objects', None)
+    if loaded is not None:
+        return loaded
+    author = User.objects.select_related('stats').filter(
+        username=username
+    ).first()
+    stats, following = None, False
+    if author is not None:
+        stats = get_user_stats(author)
+        following = (request.user.is_authenticated
+                     and request.user.follower.filter(author=author).exists())
+    request.profile_objects = (author, stats, following)
+    return request.profile_objects
+
+
+def _profile_validators(request, username):
+    author, stats, following = _load_profile(request, username)
+    if author is None:
+        return None
+    return feed_validators(
+        author.posts.all(), KEYS, viewer(request), following,
+        stats.followers, stats.follows, stats.posts
+    )
+
+
+@query_budget(6)
+@condition_feed(_index_validators)
 def index(request):
-    post_list = Post.objects.prefetch_related(
-        'comments', 'author', 'group'
-    ).all()
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.select_related('author', 'group').all()
+    page = get_page(request, post_list)
+    attach_latest_comments(page)
+
+    return render(request, "index.html", {"page": page,
+                                          "feed_etag": request.feed_etag})
+
+
+@query_budget(6)
+def hot_index(request):
+    page = Paginator(hot.top_ids(), settings.POSTS_PER_PAGES).get_page(
+        request.GET.get('page')
+    )
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page.object_list
+    )
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    attach_latest_comments(page)
 
-    return render(request, "index.html", {"page": page})
+    return render(request, 'hot.html', {'page': page,
+                                        'feed_version': feed_version()})
 
 
+@query_budget(5)
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    post_ids = search.search(query) if query else []
+    page = Paginator(post_ids, settings.POSTS_PER_PAGES).get_page(
+        request.GET.get('page')
+    )
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        page.object_list
+    )
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    attach_latest_comments(page)
+
+    return render(request, 'posts/search.html', {'page': page,
+                                                 'query': query})
+
+
+@query_budget(8)
+@condition_feed(_profile_validators)
 def profile(request, username):
-    author_object = get_object_or_404(User, username=username)
+    author_object, stats, is_subscribed = _load_profile(request, username)
+    if author_object is None:
+        raise Http404
     post_list = author_object.posts.select_related(
         'author', 'group'
-    ).prefetch_related('comments').all()
+    ).all()
 
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    page = get_page(request, post_list)
+    attach_latest_comments(page)
     form = CommentForm()
-    is_subscribed = False
-    if request.user.is_authenticated:
-        if request.user.follower.filter(author=author_object).exists():
-            is_subscribed = True
-
-    followers = Follow.objects.filter(author=author_object.pk).count()
-    follows = Follow.objects.filter(user=author_object.pk).count()
 
     return render(
         request,
@@ -44,40 +128,70 @@ def profile(request, username):
          'form': form,
          'is_comment': False,
          'following': is_subscribed,
-         'followers': followers,
-         'follows': follows
+         'stats': stats
          }
     )
 
 
+@query_budget(5)
 def post_view(request, username, post_id):
-    user_object = get_object_or_404(User, username=username)
-    post_object = get_object_or_404(Post, author=user_object, id=post_id)
-    comments = post_object.comments.all()
+    user_object = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    post_object = get_object_or_404(
+        Post.objects.select_related('author', 'group'),
+        author=user_object, id=post_id
+    )
+    comments = comment_page(post_object, request.GET.get('cursor'))
 
     form = CommentForm()
 
-    followers = Follow.objects.filter(author=user_object.pk).count()
-    follows = Follow.objects.filter(user=user_object.pk).count()
-
     return render(request, 'posts/post.html',
                   {'username': user_object,
                    'post': post_object,
                    'comments': comments,
                    'form': form,
                    'is_comment': True,
-                   'followers': followers,
-                   'follows': follows})
-
-
+                   'stats': get_user_stats(user_object)})
+
+
+@query_budget(4)
+def post_comments(request, username, post_id):
+    # Ссылка «ещё» в шаблоне строится по post.author.username
+    post_object = get_object_or_404(Post.objects.select_related('author'),
+                                    author__username=username, id=post_id)
+    comments = comment_page(post_object, request.GET.get('cursor'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {'id': comment.id,
+                 'author': comment.author.username,
+                 'text': comment.text,
+                 'created': comment.created.isoformat()}
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+
+    return render(request, 'comments_list.html',
+                  {'post': post_object, 'comments': comments})
+
+
+@query_budget(12)
 @login_required
+@rate_limit('new_post')
 def new_post(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        post.save()
+        with transaction.atomic():
+            post.save()
+            bump_user_stats(request.user.pk, posts=1)
+            if timeline.is_enabled():
+                timeline.fan_out.delay(post.pk)
+            schedule_thumbnail(post)
         return redirect('index')
 
     return render(request,
@@ -85,6 +199,7 @@ def new_post(request):
                   {'form': form})
 
 
+@query_budget(10)
 @login_required
 def post_edit(request, username, post_id):
     post_object = get_object_or_404(
@@ -98,7 +213,15 @@ def post_edit(request, username, post_id):
                     files=request.FILES or None,
                     instance=post_object)
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            post_object = form.save(commit=False)
+            if 'image' in form.changed_data:
+                post_object.thumbnail = ''
+                post_object.image_variants = {}
+            post_object.save()
+            if 'image' in form.changed_data:
+                schedule_thumbnail(post_object)
+            bump_card_version(Post.objects.filter(pk=post_object.pk))
         return redirect('post',
                         post_object.author.username,
                         post_object.id)
@@ -119,50 +242,56 @@ def server_error(request):      # pragma: no cover
     return render(request, "posts/misc/500.html", status=500)
 
 
+@query_budget(7)
 @login_required
+@rate_limit('add_comment')
+@unavailable_on_timeout
 def add_comment(request, username, post_id):
     post_author = get_object_or_404(User, username=username)
     post_object = get_object_or_404(Post, author=post_author, id=post_id)
 
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post_object
-        comment.save()
+        run_write(writes.add_comment, post_object.pk, request.user.pk,
+                  form.cleaned_data['text'])
 
     return redirect('post',
                     post_author.username,
                     post_object.id)
 
 
+@query_budget(8)
 @login_required
 def follow_index(request):
-    post_list = Post.objects.select_related(
-        'author', 'group'
-    ).prefetch_related(
-        'comments'
-    ).filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGES)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list, pagination = timeline.feed(request.user)
+    page = get_page(request, post_list.select_related('author', 'group'),
+                    **pagination)
+    attach_latest_comments(page)
 
     return(render(request, 'follow.html', {"page": page,
-                                           "username": request.user}))
+                                           "username": request.user,
+                                           "feed_version": feed_version()}))
 
 
+# Подписка и отписка — GET-запросы, лимит у них общий
+@query_budget(14)
 @login_required
+@rate_limit('follow', methods=('GET', 'POST'))
+@unavailable_on_timeout
 def profile_follow(request, username):
     author_obj = get_object_or_404(User, username=username)
     if request.user == author_obj:
         return(redirect('profile', username))
-    request.user.follower.get_or_create(author=author_obj)
+    run_write(writes.follow, request.user.pk, author_obj.pk)
 
     return(redirect('profile', username))
 
 
+@query_budget(11)
 @login_required
+@rate_limit('follow', methods=('GET', 'POST'))
+@unavailable_on_timeout
 def profile_unfollow(request, username):
     author_obj = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author_obj).delete()
+    run_write(writes.unfollow, request.user.pk, author_obj.pk)
     return(redirect('profile', username))
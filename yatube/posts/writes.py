@@ -0,0 +1,46 @@
+"""
+Мелкие записи из представлений. Выполняются через
+core.writebehind.run_write — сразу или пачкой потока-писателя,
+поэтому принимают id, а не объекты из запроса.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from . import hot, timeline
+from .caching import bump_feed_version
+from .counters import bump_user_stats
+from .models import Comment, Follow, Post
+
+
+def add_comment(post_id, author_id, text):
+    comment = Comment.objects.create(post_id=post_id, author_id=author_id,
+                                     text=text)
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + 1,
+        version=F('version') + 1,
+        hot_score=hot.comments_changed(1)
+    )
+    transaction.on_commit(bump_feed_version)
+    return comment.pk
+
+
+def follow(user_id, author_id):
+    _, created = Follow.objects.get_or_create(user_id=user_id,
+                                              author_id=author_id)
+    if created:
+        bump_user_stats(author_id, followers=1)
+        bump_user_stats(user_id, follows=1)
+        hot.followers_changed(author_id, 1)
+        timeline.backfill(user_id, author_id)
+    return created
+
+
+def unfollow(user_id, author_id):
+    deleted, _ = Follow.objects.filter(user_id=user_id,
+                                       author_id=author_id).delete()
+    if deleted:
+        # Счётчики UserStats уменьшил сигнал post_delete
+        hot.followers_changed(author_id, -1)
+        timeline.remove_author(user_id, author_id)
+        timeline.followers_decreased(author_id)
+    return bool(deleted)
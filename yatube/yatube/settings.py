@@ -39,7 +39,9 @@ INSTALLED_APPS = [
     'about.apps.AboutConfig',
     'users.apps.UsersConfig',
     'groups.apps.GroupsConfig',
+    'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -52,7 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -67,7 +71,8 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 INCLUDES_DIR = os.path.join(TEMPLATES_DIR, 'includes')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для метрик
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR, INCLUDES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -88,12 +93,82 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# База выбирается YATUBE_DB. CONN_MAX_AGE держит соединение между
+# запросами, CONN_HEALTH_CHECKS и PRAGMAS применяет core.db
+POSTGRES_DATABASE = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'NAME': os.getenv('YATUBE_DB_NAME', 'yatube'),
+    'USER': os.getenv('YATUBE_DB_USER', 'yatube'),
+    'PASSWORD': os.getenv('YATUBE_DB_PASSWORD', ''),
+    'HOST': os.getenv('YATUBE_DB_HOST', '127.0.0.1'),
+    'PORT': os.getenv('YATUBE_DB_PORT', '5432'),
+    'CONN_MAX_AGE': int(os.getenv('YATUBE_DB_CONN_MAX_AGE', '60')),
+    # Перед первым запросом в реквесте проверять, живо ли соединение
+    'CONN_HEALTH_CHECKS': True,
+}
+DATABASE_BACKENDS = {
+    'sqlite': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'NAME': os.getenv('YATUBE_DB_NAME',
+                          os.path.join(BASE_DIR, 'db.sqlite3')),
+        'OPTIONS': {'timeout': 20},
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_DB_CONN_MAX_AGE', '60')),
+        # Выполняются при каждом новом соединении: WAL не блокирует
+        # чтение записью, NORMAL не ждёт fsync на каждый коммит
+        'PRAGMAS': {
+            'journal_mode': 'wal',
+            'synchronous': 'normal',
+            'mmap_size': 256 * 2 ** 20,
+            'temp_store': 'memory',
+        },
+    },
+    'postgres': POSTGRES_DATABASE,
+    # Пул соединений снаружи: PgBouncer в режиме transaction.
+    # Серверные курсоры в этом режиме не работают
+    'pgbouncer': {
+        **POSTGRES_DATABASE,
+        'PORT': os.getenv('YATUBE_DB_PORT', '6432'),
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    },
 }
+DATABASES = {
+    'default': DATABASE_BACKENDS[os.getenv('YATUBE_DB', 'sqlite')],
+}
+# Реплика для чтения лент: та же база на другом хосте (или в другом
+# файле). Включается YATUBE_DB_REPLICA=1, без него всё идёт в default
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.getenv('YATUBE_DB_REPLICA_NAME', DATABASES['default']['NAME']),
+    'HOST': os.getenv('YATUBE_DB_REPLICA_HOST',
+                      DATABASES['default'].get('HOST', '')),
+}
+DATABASE_ROUTERS = (['core.routers.ReplicaRouter']
+                    if os.getenv('YATUBE_DB_REPLICA') == '1' else [])
+# Представления (с пространством имён), которые читают с реплики
+REPLICA_VIEWS = (
+    'index', 'slug', 'profile', 'post', 'follow_index',
+    'api:index', 'api:group_posts', 'api:profile', 'api:follow_index',
+)
+# Сколько секунд после записи клиент читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+# Групповая запись комментариев и подписок (core.writebehind): один
+# поток-писатель коммитит их пачками, а не каждый запрос отдельно
+# борется за блокировку SQLite. Запрос ждёт коммита своей пачки
+WRITE_BATCHING = os.getenv('YATUBE_WRITE_BATCHING') == '1'
+# Сколько секунд копить пачку и сколько в ней записей максимум
+WRITE_BATCH_INTERVAL = 0.005
+WRITE_BATCH_MAX = 100
+# Сколько секунд запрос ждёт, пока писатель возьмёт его запись;
+# не дождался — запись отменяется, клиент получает 503
+WRITE_BATCH_TIMEOUT = 5
+
+# Async-представления лент вместо синхронных (для запуска через asgi.py)
+ASYNC_VIEWS = os.getenv('YATUBE_ASYNC_VIEWS') == '1'
+# Независимые запросы async-представлений выполнять одновременно,
+# каждый со своим соединением. SQLite от этого только блокируется
+ASYNC_PARALLEL_QUERIES = (
+    DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3'
+)
 
 
 # Password validation
@@ -138,6 +213,17 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Загрузки: LimitedUploadHandler перестаёт принимать файл сверх
+# POST_IMAGE_MAX_BYTES, остальное как у Django по умолчанию
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.LimitedUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_BYTES = 10 * 2 ** 20
+# Больше — отказ по размерам из заголовка, до декодирования пикселей
+POST_IMAGE_MAX_PIXELS = 40 * 10 ** 6
+
 # Login
 
 LOGIN_URL = '/auth/login'
@@ -155,10 +241,128 @@ INTERNAL_IPS = [
     # ...
 ]
 
-CACHES = {
-    'default': {
+# Метрики запросов (core.middleware.MetricsMiddleware): гистограммы
+# отдаются на /metrics/ только с этих адресов (определяются по
+# RATE_LIMIT_IP_HEADER), в лог yatube.requests попадает доля запросов
+# и все медленные
+METRICS_ALLOWED_IPS = os.getenv('YATUBE_METRICS_IPS', '127.0.0.1').split(',')
+# Если задан, /metrics/ отдаётся только с заголовком
+# «Authorization: Bearer <токен>» (bearer_token в Prometheus),
+# а адреса не проверяются
+METRICS_TOKEN = os.getenv('YATUBE_METRICS_TOKEN', '')
+METRICS_LOG_SAMPLE_RATE = float(os.getenv('YATUBE_METRICS_SAMPLE', '0.01'))
+METRICS_SLOW_MS = 500
+# Превышение бюджета запросов (core.budgets): при разработке и в тестах
+# — исключение, в бою — предупреждение в лог yatube.query_budget
+QUERY_BUDGET_STRICT = os.getenv('YATUBE_QUERY_BUDGET_STRICT',
+                                '1' if DEBUG else '0') == '1'
+QUERY_BUDGET_LOG_SAMPLE_RATE = 1.0
+
+# Ограничение частоты записей (core.ratelimit): скользящее окно
+# 'число/s|m|h|d' на пользователя ('user') и на IP-адрес ('ip')
+RATE_LIMIT_ENABLED = os.getenv('YATUBE_RATE_LIMIT', '1') == '1'
+RATE_LIMITS = {
+    'new_post': {'user': '10/m', 'ip': '30/m'},
+    'add_comment': {'user': '20/m', 'ip': '60/m'},
+    'follow': {'user': '30/m', 'ip': '100/m'},
+    'signup': {'ip': '5/h'},
+}
+# Заголовок с адресом клиента за прокси, например HTTP_X_REAL_IP;
+# из HTTP_X_FORWARDED_FOR берётся последний адрес
+RATE_LIMIT_IP_HEADER = os.getenv('YATUBE_RATE_LIMIT_IP_HEADER',
+                                 'REMOTE_ADDR')
+
+# Фоновые задачи (core.tasks): миниатюры, раскладка постов по лентам.
+# immediate — в том же запросе после коммита, thread — в пуле потоков
+# процесса, database — очередь в базе, её разбирает manage.py run_tasks
+TASK_BROKERS = {
+    'immediate': 'core.tasks.ImmediateBroker',
+    'thread': 'core.tasks.ThreadBroker',
+    'database': 'core.tasks.DatabaseBroker',
+}
+TASK_BROKER = TASK_BROKERS[os.getenv('YATUBE_TASK_BROKER', 'thread')]
+TASK_THREADS = 2
+# Упавшая задача повторяется через TASK_RETRY_DELAY секунд, затем
+# через вдвое больше и так до TASK_RETRIES повторов
+TASK_RETRIES = 3
+TASK_RETRY_DELAY = 5
+# Сколько секунд задача из базы принадлежит взявшему её обработчику;
+# потом её заберёт другой. Должно быть больше времени любой задачи
+TASK_LEASE = 300
+TASK_POLL_INTERVAL = 1
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.requests': {'handlers': ['console'], 'level': 'INFO',
+                            'propagate': False},
+        'yatube.query_budget': {'handlers': ['console'],
+                                'level': 'WARNING', 'propagate': False},
+        'yatube.tasks': {'handlers': ['console'], 'level': 'INFO',
+                         'propagate': False},
+    },
+}
+
+# Кэш: locmem — свой в каждом процессе, redis — общий для всех
+# воркеров и переживает перезапуск. Файлового бэкенда нет: single-flight
+# в posts.caching опирается на атомарные add/incr, а FileBasedCache
+# их не гарантирует.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('YATUBE_CACHE_LOCATION',
+                              'redis://127.0.0.1:6379/1'),
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[os.getenv('YATUBE_CACHE', 'locmem')],
 }
+# Сколько секунд после истечения отдавать устаревший фрагмент,
+# пока один запрос его пересчитывает
+FEED_CACHE_STALE = 30
+FEED_CACHE_LOCK_TIMEOUT = 5
+FEED_CACHE_POLL_INTERVAL = 0.05
 
 POSTS_PER_PAGES = 10
+# Сколько секунд прокси может отдавать анонимную ленту без
+# перепроверки; 0 — каждый раз спрашивать с If-None-Match
+FEED_PROXY_MAX_AGE = 0
+# Больше постов за один запрос к API не отдаём
+API_MAX_LIMIT = 50
+# Миниатюра картинки поста для ленты: геометрия и опции sorl
+POST_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+# Варианты той же миниатюры для srcset: ширины и форматы по убыванию
+# предпочтения, последний формат — запасной для <img src>
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_FORMATS = ('WEBP', 'JPEG')
+POST_IMAGE_QUALITY = 80
+# Сколько лучших совпадений полнотекстового поиска листать
+SEARCH_MAX_RESULTS = 1000
+COMMENTS_PER_PAGE = 20
+# Сколько последних комментариев показывать в карточке ленты
+COMMENTS_PER_CARD = 3
+
+# Вкладка популярных (posts.hot): вес поста — комментарии и подписчики
+# автора, а пост на HOT_HALF_LIFE секунд новее равен вдвое более весомому
+HOT_COMMENT_WEIGHT = 1.0
+HOT_FOLLOWER_WEIGHT = 0.1
+HOT_HALF_LIFE = 12 * 3600
+# На вкладку попадают HOT_SIZE лучших постов за последние HOT_WINDOW
+# секунд; их список живёт в кэше HOT_CACHE_SECONDS
+HOT_WINDOW = 3 * 24 * 3600
+HOT_SIZE = 100
+HOT_CACHE_SECONDS = 60
+
+# Лента подписок через материализованные входящие (fan-out on write)
+FEED_FANOUT = False
+# Авторы с таким числом подписчиков читаются в ленту при запросе
+FEED_CELEBRITY_FOLLOWERS = 10000
+FEED_INBOX_SIZE = 800
+FEED_FANOUT_BATCH = 1000
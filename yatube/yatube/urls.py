@@ -13,6 +13,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from core.views import metrics_view
 from django.conf import settings
 from django.conf.urls import handler404, handler500
 from django.conf.urls.static import static
@@ -25,6 +26,8 @@ handler500 = "posts.views.server_error"     # noqa
 urlpatterns = [
     # import rules from admin app
     path('admin/', admin.site.urls),
+    path('api/', include('api.urls', namespace='api')),
+    path('metrics/', metrics_view, name='metrics'),
     # import rules from posts
     path("", include("posts.urls")),
     path('group/', include("groups.urls")),